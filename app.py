@@ -3,12 +3,14 @@ import os
 from hate_speech_detection.configuration.config_manager import ConfigurationManager
 from hate_speech_detection.pipeline.train_pipeline import TrainPipeline
 from hate_speech_detection.pipeline.prediction_pipeline import PredictionPipeline
+from hate_speech_detection.logger import setup_logging
 from hate_speech_detection.logger.logger import logger
 from hate_speech_detection.exception.exception import PipelineExecutionError
 
 
 if __name__ == "__main__":
     os.environ["PYTHONUTF8"] = "1"
+    setup_logging()
 
     try:
         config_manager = ConfigurationManager()
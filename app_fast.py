@@ -1,28 +1,94 @@
+import time
 import asyncio
+import json
+import itertools
+import tempfile
+from contextlib import asynccontextmanager
 import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import (
+    StreamingResponse,
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 
 from hate_speech_detection.configuration.config_manager import ConfigurationManager
-from hate_speech_detection.pipeline.train_pipeline import TrainPipeline
 from hate_speech_detection.pipeline.prediction_pipeline import PredictionPipeline
+from hate_speech_detection.pipeline.batch_scheduler import MicroBatcher
+from hate_speech_detection.pipeline.serving_metrics import ServingMetrics
+from hate_speech_detection.pipeline.training_jobs import (
+    TrainingJobManager,
+    format_event,
+)
 from hate_speech_detection.exception.exception import CustomException
+from hate_speech_detection.logger import setup_logging
+from hate_speech_detection.logger.logger import clean_old_logs, log_stats, logger
 
 
+started_at = time.time()
 config_manager = ConfigurationManager()
 web_config = config_manager.get_web_config()
 app_host = web_config.app_host
 app_port = web_config.app_port
+predict_pipeline = PredictionPipeline(config_manager)
+batcher = MicroBatcher(
+    predict_pipeline.run_batch,
+    max_batch_size=web_config.max_batch_size,
+    max_wait_ms=web_config.max_batch_wait_ms,
+    max_queue_size=web_config.max_queue_size,
+)
+serving_metrics = ServingMetrics(predict_pipeline, batcher)
+training_jobs = TrainingJobManager(web_config)
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    registry = predict_pipeline.registry
+    loop = asyncio.get_event_loop()
+    setup_logging()
+    await loop.run_in_executor(None, clean_old_logs)
+    await loop.run_in_executor(None, predict_pipeline.cleaner.load)
+    try:
+        await loop.run_in_executor(None, registry.load)
+    except Exception as e:
+        logger.warning(f"Prediction artifacts not loaded at startup: {e}")
+    registry.start_watcher()
+    await batcher.start()
+    yield
+    await batcher.stop()
+    registry.stop_watcher()
+    await loop.run_in_executor(None, training_jobs.shutdown)
+    await loop.run_in_executor(None, predict_pipeline.save_report)
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates keep the label set bounded, unknown paths share one
+        route = request.scope.get("route")
+        serving_metrics.observe_request(
+            getattr(route, "path", "unmatched"),
+            request.method,
+            status,
+            time.perf_counter() - start,
+        )
+
+
 @app.get("/", tags=["ui"])
 async def index():
     return FileResponse("static/predict.html")
@@ -31,20 +97,52 @@ async def index():
 @app.get("/train", tags=["training"])
 async def training():
     async def stream_training_logs():
+        loop = asyncio.get_event_loop()
         try:
+            job, created = await loop.run_in_executor(None, training_jobs.submit)
+        except Exception as e:
+            yield f"Error Occurred! {e}\n"
+            return
+        if created:
             yield "Starting training...\n"
-            train_pipeline = TrainPipeline(config_manager)
+        else:
+            yield "Training already running, following it...\n"
+        yield f"Job {job.job_id}\n"
 
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, train_pipeline.run_pipeline)
+        # The job runs in its own process, possibly started by another
+        # worker; this only polls its shared status and new events
+        offset = 0
+        while True:
+            job = await loop.run_in_executor(None, training_jobs.get, job.job_id) or job
+            finished = job.finished
+            events, offset = await loop.run_in_executor(
+                None, training_jobs.read_events, job.job_id, offset
+            )
+            for event in events:
+                line = format_event(event)
+                if line:
+                    yield line
+            if finished:
+                break
+            await asyncio.sleep(0.5)
 
+        if job.state == "succeeded":
             yield "Training successful!\n"
-        except Exception as e:
-            yield f"Error Occurred! {e}\n"
+        else:
+            yield f"Error Occurred! {job.error}\n"
 
     return StreamingResponse(stream_training_logs(), media_type="text/plain")
 
 
+@app.get("/train/{job_id}", tags=["training"])
+async def training_job(job_id: str):
+    loop = asyncio.get_event_loop()
+    status = await loop.run_in_executor(None, training_jobs.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown training job")
+    return status
+
+
 class PredictRequest(BaseModel):
     text: str
 
@@ -52,13 +150,179 @@ class PredictRequest(BaseModel):
 @app.post("/predict", tags=["prediction"])
 async def predict_route(request: PredictRequest):
     try:
-        predict = PredictionPipeline(config_manager)
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, predict.run_pipeline, request.text)
+        result = await batcher.submit(request.text)
         return {"prediction": result}
     except Exception as e:
         raise CustomException(e) from e
 
 
+class PredictBatchRequest(BaseModel):
+    texts: list[str]
+
+
+async def _score_in_chunks(texts):
+    loop = asyncio.get_event_loop()
+    chunk_size = web_config.stream_chunk_size
+    results = []
+    for start in range(0, len(texts), chunk_size):
+        chunk = texts[start : start + chunk_size]
+        results.extend(
+            await loop.run_in_executor(
+                None,
+                serving_metrics.timed_batch("chunk", predict_pipeline.run_batch, chunk),
+            )
+        )
+    return results
+
+
+@app.post("/predict_batch", tags=["prediction"])
+async def predict_batch_route(request: PredictBatchRequest):
+    if len(request.texts) > web_config.max_batch_texts:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {web_config.max_batch_texts} texts per request, "
+            "use /predict_stream for larger inputs",
+        )
+    try:
+        return {"predictions": await _score_in_chunks(request.texts)}
+    except Exception as e:
+        raise CustomException(e) from e
+
+
+@app.post("/predict_stream", tags=["prediction"])
+async def predict_stream_route(
+    request: Request, text_field: str = "text", id_field: str = "id"
+):
+    """
+    Scores an NDJSON body (one JSON object per line) and streams one NDJSON
+    result per input line. The body is spooled to a temporary file and
+    scored one chunk of records at a time, so memory stays bounded. The
+    spool may be on disk, so it is written and read in the executor. If
+    scoring fails the stream ends with an {"error": ...} line.
+
+    Bodies over web.stream_max_bytes are rejected with 413, from the
+    Content-Length header when there is one, else once the spool passes it.
+    """
+    max_bytes = web_config.stream_max_bytes
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"At most {max_bytes} bytes per request, split the input",
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    loop = asyncio.get_event_loop()
+    chunk_size = web_config.stream_chunk_size
+    body = tempfile.SpooledTemporaryFile(max_size=web_config.stream_spool_size)
+    try:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise too_large
+            await loop.run_in_executor(None, body.write, chunk)
+        body.seek(0)
+    except BaseException:
+        body.close()
+        raise
+
+    def read_lines():
+        return list(itertools.islice(body, chunk_size))
+
+    async def flush(pending):
+        texts = [record[text_field] for _, record, error in pending if not error]
+        predictions = iter(await _score_in_chunks(texts))
+        lines = []
+        for line_no, record, error in pending:
+            result = {"line": line_no}
+            if error:
+                result["error"] = error
+            else:
+                if id_field in record:
+                    result[id_field] = record[id_field]
+                result["prediction"] = next(predictions)
+            lines.append(json.dumps(result) + "\n")
+        return "".join(lines)
+
+    async def stream_predictions():
+        pending = []
+        line_no = 0
+        try:
+            while True:
+                lines = await loop.run_in_executor(None, read_lines)
+                if not lines:
+                    break
+                for line in lines:
+                    line_no += 1
+                    if not line.strip():
+                        continue
+                    record, error = None, None
+                    try:
+                        record = json.loads(line)
+                        if not isinstance(record, dict) or not isinstance(
+                            record.get(text_field), str
+                        ):
+                            raise ValueError(f"missing string field '{text_field}'")
+                    except ValueError as e:
+                        error = str(e)
+
+                    pending.append((line_no, record, error))
+                    if len(pending) >= chunk_size:
+                        yield await flush(pending)
+                        pending = []
+
+            if pending:
+                yield await flush(pending)
+        except Exception as e:
+            # Tells the client the results stop here, not at the end of input
+            logger.error(f"Stream scoring failed near line {line_no}: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            body.close()
+
+    return StreamingResponse(stream_predictions(), media_type="application/x-ndjson")
+
+
+@app.get("/health", tags=["monitoring"])
+async def health():
+    """Liveness: the process answers, whatever the state of the model."""
+    return {
+        "status": "ok",
+        "uptime_seconds": round(time.time() - started_at, 3),
+        "model": predict_pipeline.registry.status(),
+    }
+
+
+@app.get("/ready", tags=["monitoring"])
+async def ready():
+    """Readiness: 503 until the model is loaded and warmed up."""
+    status = predict_pipeline.registry.status()
+    if not predict_pipeline.registry.is_ready:
+        return JSONResponse(status_code=503, content={"ready": False, **status})
+    return {"ready": True, **status}
+
+
+@app.get("/metrics", tags=["monitoring"])
+async def metrics():
+    """Prometheus text format."""
+    return PlainTextResponse(
+        serving_metrics.render(), media_type=serving_metrics.registry.CONTENT_TYPE
+    )
+
+
+@app.get("/stats", tags=["monitoring"])
+async def get_stats():
+    stats = {"batching": batcher.stats()}
+    stats["timings"] = predict_pipeline.instrumentation.report()
+    stem_cache = predict_pipeline.cleaner.stem_cache
+    if stem_cache is not None:
+        stats["stem_cache"] = stem_cache.stats()
+    if predict_pipeline.result_cache is not None:
+        stats["result_cache"] = predict_pipeline.result_cache.stats()
+    stats["logging"] = log_stats()
+    return stats
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host=app_host, port=app_port)
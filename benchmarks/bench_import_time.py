@@ -0,0 +1,83 @@
+"""
+Measures how long importing the web app takes in a fresh interpreter and
+which heavy libraries it pulls in. Exits with 1 when the median import time
+is over --max-seconds or a forbidden library is imported, so it can guard
+startup time in CI.
+
+    python benchmarks/bench_import_time.py --runs 5 --max-seconds 2
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = [
+    "tensorflow",
+    "keras",
+    "sklearn",
+    "scipy",
+    "pandas",
+    "pyarrow",
+    "matplotlib",
+    "nltk",
+    "emoji",
+]
+# Only the training stack and the keras engine need these
+FORBIDDEN_MODULES = ["tensorflow", "keras", "sklearn", "matplotlib"]
+
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+
+
+def measure(module: str) -> dict:
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    # The last line is the probe result, the app may log before it
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app_fast")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=0)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    seconds = sorted(run["seconds"] for run in runs)
+    loaded = runs[-1]["loaded"]
+    print(
+        f"import {args.module} - median: {statistics.median(seconds):.2f} s, min: {seconds[0]:.2f} s, max: {seconds[-1]:.2f} s"
+    )
+    print(f"heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+    failed = False
+    forbidden = [name for name in loaded if name in FORBIDDEN_MODULES]
+    if forbidden:
+        print(f"FAIL: {args.module} imports {', '.join(forbidden)}")
+        failed = True
+    if args.max_seconds and statistics.median(seconds) > args.max_seconds:
+        print(f"FAIL: median import time is over {args.max_seconds:.2f} s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Compares NumPy LSTM inference over the full padded sequence with the
+length-aware mode (bucketing plus converged padding steps).
+
+Uses the exported prediction model and the transformed tweets when they
+exist, otherwise random weights and a synthetic tweet length distribution.
+
+    python benchmarks/bench_sequence_length.py --rows 2000
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hate_speech_detection.configuration.config_manager import ConfigurationManager
+from hate_speech_detection.ml.numpy_lstm import MANIFEST_NAME, NumpyLSTMModel
+from hate_speech_detection.ml.vectorizer import TextVectorizer
+from hate_speech_detection.utils.dataframe_io import load_dataframe
+
+
+def load_model_arrays(pred_config, train_config, rng):
+    if os.path.exists(os.path.join(pred_config.numpy_model_path, MANIFEST_NAME)):
+        model = NumpyLSTMModel.load(pred_config.numpy_model_path, mmap=False)
+        arrays = {
+            "embeddings": model.embeddings,
+            "lstm_kernel": model.kernel,
+            "lstm_recurrent_kernel": model.recurrent_kernel,
+            "lstm_bias": model.bias,
+            "dense_kernel": model.dense_kernel,
+            "dense_bias": model.dense_bias,
+        }
+        return arrays, pred_config.numpy_model_path
+
+    # Same shapes as ModelArchitecture.get_model
+    units, embedding_dim = 100, 100
+    scale = 0.1
+    arrays = {
+        "embeddings": rng.normal(0, scale, (train_config.max_words, embedding_dim)),
+        "lstm_kernel": rng.normal(0, scale, (embedding_dim, 4 * units)),
+        "lstm_recurrent_kernel": rng.normal(0, scale, (units, 4 * units)),
+        "lstm_bias": np.zeros(4 * units),
+        "dense_kernel": rng.normal(0, scale, (units, 1)),
+        "dense_bias": np.zeros(1),
+    }
+    arrays = {name: array.astype(np.float32) for name, array in arrays.items()}
+    return arrays, "random weights"
+
+
+def load_token_ids(config_manager, rows, rng):
+    trans_config = config_manager.get_data_transformation_config()
+    pred_config = config_manager.get_prediction_config()
+    train_config = config_manager.get_model_trainer_config()
+    if os.path.exists(trans_config.transformed_file_path) and os.path.exists(
+        pred_config.tokenizer_config_path
+    ):
+        tweets = load_dataframe(
+            trans_config.transformed_file_path, columns=[trans_config.tweet_column]
+        )[trans_config.tweet_column].dropna()
+        tweets = tweets.sample(min(rows, len(tweets)), random_state=0)
+        vectorizer = TextVectorizer.load(pred_config.tokenizer_config_path)
+        return vectorizer(tweets), trans_config.transformed_file_path
+
+    # Unigrams plus 4-grams of tweets with ~15 cleaned words on average
+    words = np.clip(rng.lognormal(2.5, 0.6, rows).astype(int), 1, 60)
+    lengths = np.minimum(words + np.maximum(words - 3, 0), train_config.max_len)
+    token_ids = np.zeros((rows, train_config.max_len), dtype=np.int64)
+    for row, length in enumerate(lengths):
+        token_ids[row, :length] = rng.integers(1, train_config.max_words, length)
+    return token_ids, "synthetic lengths"
+
+
+def timed(model, token_ids, repeats):
+    best, outputs = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        outputs = model.predict(token_ids)
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--bucket-size", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    config_manager = ConfigurationManager()
+    pred_config = config_manager.get_prediction_config()
+    train_config = config_manager.get_model_trainer_config()
+    arrays, weights_source = load_model_arrays(pred_config, train_config, rng)
+    token_ids, data_source = load_token_ids(config_manager, args.rows, rng)
+    manifest = {
+        "lstm_activation": "tanh",
+        "lstm_recurrent_activation": "sigmoid",
+        "dense_activation": "sigmoid",
+    }
+
+    lengths = NumpyLSTMModel.sequence_lengths(token_ids)
+    print(f"weights: {weights_source}")
+    print(f"data: {data_source}, rows: {len(token_ids)}, padded length: {token_ids.shape[1]}")
+    print(
+        f"real length - mean: {lengths.mean():.1f}, p50: {np.percentile(lengths, 50):.0f}, p95: {np.percentile(lengths, 95):.0f}"
+    )
+
+    # A negative tolerance never converges: every padding step is computed
+    modes = {
+        "full padding": dict(converge_tol=-1.0),
+        "bucketed, converged padding": dict(converge_tol=1e-6),
+    }
+    baseline_time, baseline = None, None
+    for name, options in modes.items():
+        bucket_size = len(token_ids) if name == "full padding" else args.bucket_size
+        model = NumpyLSTMModel(arrays, manifest, bucket_size=bucket_size, **options)
+        seconds, outputs = timed(model, token_ids, args.repeats)
+        if baseline is None:
+            baseline_time, baseline = seconds, outputs
+        max_diff = float(np.max(np.abs(outputs - baseline)))
+        print(
+            f"{name:30s} {seconds * 1000:9.1f} ms  speedup {baseline_time / seconds:5.1f}x  max diff {max_diff:.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Benchmark suite for cleaning, vectorization, inference and serving.
+
+Runs on a synthetic tweet corpus in a scratch working directory, with an
+untrained model and a vocabulary adapted on that corpus, so results only
+depend on the code, the corpus size and the machine. Every benchmark keeps
+the best of --repeats runs after a warm-up run. Results are saved as JSON and compared with a
+baseline saved earlier on the same machine; a benchmark more than its
+threshold slower than the baseline is a regression and the exit code is 1.
+
+    python benchmarks/run_benchmarks.py --rows 2000 --save-baseline
+    python benchmarks/run_benchmarks.py --rows 2000 --suites cleaning,inference
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT_DIR, "benchmarks")
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_corpus import make_corpus
+
+SUITES = ("cleaning", "vectorization", "inference", "pipeline", "serving")
+# Allowed slowdown before a benchmark counts as a regression; serving goes
+# through the event loop and thread pool, so it is noisier
+THRESHOLDS = {"serving": 0.5}
+DEFAULT_THRESHOLD = 0.2
+
+
+def timed(fn, repeats: int) -> float:
+    """Best time of repeats runs, after one untimed run that warms caches."""
+    fn()
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def result(seconds: float, items: int, **extra) -> dict:
+    return {
+        "seconds": seconds,
+        "items": items,
+        "items_per_second": items / seconds if seconds else None,
+        "ms_per_item": seconds * 1000 / items if items else None,
+        **extra,
+    }
+
+
+def prepare_workdir(workdir: str):
+    """
+    The config and artifact paths are relative to the working directory, so
+    the package and the static files are linked into a scratch directory.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    for name in ("hate_speech_detection", "static"):
+        link = os.path.join(workdir, name)
+        if not os.path.exists(link):
+            os.symlink(os.path.join(ROOT_DIR, name), link)
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT_DIR)
+
+
+class BenchmarkRunner:
+    def __init__(self, args):
+        self.args = args
+        self.corpus = make_corpus(args.rows, args.seed)
+        self.results = {}
+
+        from hate_speech_detection.configuration.config_manager import (
+            ConfigurationManager,
+        )
+
+        self.config_manager = ConfigurationManager()
+        config = self.config_manager.config
+        # Scored for real on every request, not served from the result cache
+        config.prediction["result_cache_size"] = 0
+        config.prediction["reload_interval"] = 0
+        config.prediction["engine"] = args.engine
+        self.trans_config = self.config_manager.get_data_transformation_config()
+        self.train_config = self.config_manager.get_model_trainer_config()
+        self.pred_config = self.config_manager.get_prediction_config()
+        self._artifacts_ready = False
+
+    def record(self, name: str, value: dict):
+        self.results[name] = value
+        rate = value.get("items_per_second")
+        rate_text = f", {rate:,.0f} items/s" if rate else ""
+        print(f"{name:45s} {value['seconds'] * 1000:10.1f} ms{rate_text}", flush=True)
+
+    def cleaning(self):
+        from hate_speech_detection.components.data_transforamation import (
+            DataTransformation,
+        )
+
+        ingest_config = self.config_manager.get_data_ingestion_config()
+        transformation = DataTransformation(self.trans_config, ingest_config)
+        transformation.cleaner.load()
+        repeats = self.args.repeats
+
+        def single():
+            for text in self.corpus:
+                transformation.data_cleaning(text)
+
+        self.record(
+            "cleaning.single", result(timed(single, repeats), len(self.corpus))
+        )
+        seconds = timed(lambda: transformation.cleaner.clean_batch(self.corpus), repeats)
+        self.record("cleaning.batch", result(seconds, len(self.corpus)))
+
+        stem_cache = transformation.cleaner.stem_cache
+        if stem_cache is not None:
+            # One pass from an empty cache is what training sees; a second
+            # pass over the same texts is serving with recurring inputs
+            stem_cache.clear()
+            for name in ("cleaning.stem_cache_cold", "cleaning.stem_cache_warm"):
+                hits, misses = stem_cache.hits, stem_cache.misses
+                start = time.perf_counter()
+                transformation.cleaner.clean_batch(self.corpus)
+                seconds = time.perf_counter() - start
+                hits, misses = stem_cache.hits - hits, stem_cache.misses - misses
+                hit_rate = hits / (hits + misses) if hits + misses else 0.0
+                self.record(
+                    name,
+                    result(seconds, len(self.corpus), hit_rate=round(hit_rate, 4)),
+                )
+                print(f"{'':45s} hit rate {hit_rate:.1%}", flush=True)
+
+    def _cleaned_corpus(self) -> list:
+        from hate_speech_detection.components.text_cleaner import TextCleaner
+
+        cleaner = TextCleaner(
+            self.trans_config.language,
+            self.trans_config.more_stopwords,
+            self.trans_config.stem_cache_size,
+            self.trans_config.stopwords_dir,
+        )
+        return cleaner.clean_batch(self.corpus)
+
+    def vectorization(self):
+        import numpy as np
+        from hate_speech_detection.components.data_tokenizer import DataTokenizer
+        from hate_speech_detection.ml.vectorizer import TextVectorizer
+
+        texts = np.array(self._cleaned_corpus(), dtype=str)
+        repeats = self.args.repeats
+        tokenizer = DataTokenizer(self.train_config)
+        for mode in ("adapt", "streaming"):
+            self.train_config.vocab_mode = mode
+            seconds = timed(lambda: tokenizer.adapt(texts), repeats)
+            self.record(f"vectorization.adapt_{mode}", result(seconds, len(texts)))
+        self.train_config.vocab_mode = "adapt"
+
+        seconds = timed(lambda: tokenizer.tokenize(texts), repeats)
+        self.record("vectorization.tokenize", result(seconds, len(texts)))
+
+        vectorizer = TextVectorizer.from_layer(tokenizer.adapt(texts))
+        seconds = timed(lambda: vectorizer(texts), repeats)
+        self.record("vectorization.text_vectorizer", result(seconds, len(texts)))
+
+    def _build_artifacts(self):
+        """Untrained model and corpus vocabulary at the prediction paths."""
+        if self._artifacts_ready:
+            return
+        import keras
+        import numpy as np
+        from hate_speech_detection.components.data_tokenizer import DataTokenizer
+        from hate_speech_detection.ml.model import ModelArchitecture
+        from hate_speech_detection.ml.numpy_lstm import export_weights
+        from hate_speech_detection.ml.vectorizer import TextVectorizer
+
+        keras.utils.set_random_seed(self.args.seed)
+        texts = np.array(self._cleaned_corpus(), dtype=str)
+        layer = DataTokenizer(self.train_config).adapt(texts)
+        TextVectorizer.from_layer(layer).save(
+            self.pred_config.tokenizer_config_path, self.pred_config.vocab_path
+        )
+        self.model = ModelArchitecture(self.train_config).get_model()
+        self.model.predict(np.zeros((1, self.train_config.max_len)), verbose=0)
+        self.model.save(self.pred_config.model_path)
+        export_weights(self.model, self.pred_config.numpy_model_path)
+        self._artifacts_ready = True
+
+    def inference(self):
+        import numpy as np
+        from hate_speech_detection.ml.numpy_lstm import NumpyLSTMModel
+        from hate_speech_detection.ml.vectorizer import TextVectorizer
+
+        self._build_artifacts()
+        vectorizer = TextVectorizer.load(self.pred_config.tokenizer_config_path)
+        token_ids = vectorizer(self._cleaned_corpus())
+        models = {
+            "keras": self.model,
+            "numpy": NumpyLSTMModel.load(
+                self.pred_config.numpy_model_path,
+                converge_tol=self.pred_config.numpy_converge_tol,
+                bucket_size=self.pred_config.numpy_bucket_size,
+            ),
+        }
+        rows = min(len(token_ids), self.args.inference_rows)
+        for length in self.args.sequence_lengths:
+            if length > token_ids.shape[1]:
+                continue
+            x = np.ascontiguousarray(token_ids[:rows, :length])
+            for engine, model in models.items():
+                for batch_size in self.args.batch_sizes:
+                    seconds = timed(
+                        lambda: model.predict(x, batch_size=batch_size, verbose=0),
+                        self.args.repeats,
+                    )
+                    self.record(
+                        f"inference.{engine}.len{length}.batch{batch_size}",
+                        result(seconds, rows),
+                    )
+
+    def _prediction_pipeline(self):
+        from hate_speech_detection.pipeline.prediction_pipeline import (
+            PredictionPipeline,
+        )
+
+        self._build_artifacts()
+        pipeline = PredictionPipeline(self.config_manager)
+        pipeline.cleaner.load()
+        pipeline.registry.load()
+        return pipeline
+
+    def pipeline(self):
+        pipeline = self._prediction_pipeline()
+        texts = self.corpus[: self.args.latency_requests]
+
+        def run_each():
+            for text in texts:
+                pipeline.run_pipeline(text)
+
+        seconds = timed(run_each, self.args.repeats)
+        self.record("pipeline.run_pipeline", result(seconds, len(texts)))
+        seconds = timed(lambda: pipeline.run_batch(self.corpus), self.args.repeats)
+        self.record("pipeline.run_batch", result(seconds, len(self.corpus)))
+
+    def serving(self):
+        try:
+            import httpx
+        except ImportError:
+            print("serving: skipped, httpx is not installed")
+            return
+        self._build_artifacts()
+        import app_fast
+
+        # The app builds its pipeline from the config file, apply the overrides
+        predict_pipeline = app_fast.predict_pipeline
+        predict_pipeline.result_cache = None
+        predict_pipeline.registry.config.engine = self.args.engine
+        predict_pipeline.registry.config.reload_interval = 0
+        texts = self.corpus[: self.args.serving_requests]
+        concurrency = self.args.concurrency
+
+        async def run_requests(client):
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies = []
+
+            async def one(text):
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post("/predict", json={"text": text})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(text) for text in texts))
+            return time.perf_counter() - start, sorted(latencies)
+
+        async def main():
+            transport = httpx.ASGITransport(app=app_fast.app)
+            async with app_fast.app.router.lifespan_context(app_fast.app):
+                async with httpx.AsyncClient(
+                    transport=transport, base_url="http://bench"
+                ) as client:
+                    await run_requests(client)
+                    runs = [
+                        await run_requests(client) for _ in range(self.args.repeats)
+                    ]
+            return min(runs, key=lambda run: run[0])
+
+        seconds, latencies = asyncio.run(main())
+        self.record(
+            "serving.predict",
+            result(
+                seconds,
+                len(texts),
+                concurrency=concurrency,
+                p50_ms=statistics.median(latencies) * 1000,
+                p95_ms=latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+            ),
+        )
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "rows": args.rows,
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "engine": args.engine,
+    }
+
+
+def threshold_for(name: str, default: float) -> float:
+    return THRESHOLDS.get(name.split(".")[0], default)
+
+
+def compare(results: dict, baseline: dict, default_threshold: float) -> list:
+    """Prints the slowdown of every benchmark, returns the regressed ones."""
+    if baseline["meta"].get("rows") != results["meta"]["rows"]:
+        print("Warning: the baseline was run on a corpus of another size")
+    regressions = []
+    print(f"\n{'benchmark':45s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for name, current in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"{name:45s} {'-':>10s} {current['seconds'] * 1000:8.1f}ms    new")
+            continue
+        change = current["seconds"] / previous["seconds"] - 1
+        threshold = threshold_for(name, default_threshold)
+        flag = ""
+        if change > threshold:
+            flag = f"  REGRESSION (> {threshold:+.0%})"
+            regressions.append(name)
+        print(
+            f"{name:45s} {previous['seconds'] * 1000:8.1f}ms {current['seconds'] * 1000:8.1f}ms {change:+7.1%}{flag}"
+        )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument("--engine", default="keras", help="engine of pipeline/serving")
+    parser.add_argument("--batch-sizes", default="1,8,64,256")
+    parser.add_argument("--sequence-lengths", default="50,300")
+    parser.add_argument("--inference-rows", type=int, default=512)
+    parser.add_argument("--latency-requests", type=int, default=100)
+    parser.add_argument("--serving-requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--output", default=os.path.join(BENCH_DIR, "results", "latest.json")
+    )
+    parser.add_argument(
+        "--baseline", default=os.path.join(BENCH_DIR, "results", "baseline.json")
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="also save as the baseline"
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--workdir", help="scratch directory, a temporary one by default")
+    args = parser.parse_args()
+    args.suites = [suite for suite in args.suites.split(",") if suite]
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    args.batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    args.sequence_lengths = [int(size) for size in args.sequence_lengths.split(",")]
+    args.output = os.path.abspath(args.output)
+    args.baseline = os.path.abspath(args.baseline)
+    return args
+
+
+def main():
+    args = parse_args()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="hate-speech-bench-")
+    prepare_workdir(os.path.abspath(workdir))
+    try:
+        runner = BenchmarkRunner(args)
+        for suite in SUITES:
+            if suite in args.suites:
+                getattr(runner, suite)()
+    finally:
+        os.chdir(ROOT_DIR)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {"meta": metadata(args), "results": runner.results}
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved: {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create it")
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline saved: {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
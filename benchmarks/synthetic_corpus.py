@@ -0,0 +1,69 @@
+"""
+Synthetic tweets with the features the cleaning targets: retweet markers,
+mentions, links, hashtags, HTML entities, digits, punctuation, emoji and
+mixed case, with a long-tailed length distribution and some repeated
+tweets. The same seed always gives the same corpus.
+"""
+
+import random
+import itertools
+
+WORDS = (
+    "the a to and you i is it that of in for my on me this be so just not "
+    "have with are but what your at all like get was do no up we out lol if "
+    "one can about they love people now know when time day good bitch hoe "
+    "trash dumb stupid ugly fuck shit ass nigga hate kill crazy idiot loser "
+    "damn hell mad funny game team school work night today tomorrow tweet "
+    "follow back real talk never always girl boy man friend family money "
+    "phone music video party happy sad bored tired sleep wake coffee pizza"
+).split()
+EMOJI = ["\U0001f602", "\U0001f525", "\U0001f621", "\U0001f44d", "❤️"]
+ENTITIES = ["&amp;", "&lt;3", "&#128514;", "&gt;"]
+PUNCTUATION = ["!", "!!!", "?", "...", ",", ".", ":", "\""]
+# Zipf's law: the n-th most frequent word is n times rarer than the first
+ZIPF_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(WORDS) + 1)))
+
+
+def _word(rng: random.Random) -> str:
+    word = rng.choices(WORDS, cum_weights=ZIPF_WEIGHTS)[0]
+    roll = rng.random()
+    if roll < 0.05:
+        return word.upper()
+    if roll < 0.08:
+        return word + word[-1] * rng.randint(2, 5)
+    if roll < 0.10:
+        return f"{word}{rng.randint(1, 99)}"
+    return word
+
+
+def make_tweet(rng: random.Random) -> str:
+    parts = []
+    if rng.random() < 0.3:
+        parts.append(f"RT @user{rng.randint(1, 5000)}:")
+    for _ in range(max(1, int(rng.lognormvariate(2.3, 0.6)))):
+        roll = rng.random()
+        if roll < 0.05:
+            parts.append(f"@user{rng.randint(1, 5000)}")
+        elif roll < 0.08:
+            parts.append(f"#{_word(rng)}")
+        elif roll < 0.10:
+            parts.append(rng.choice(ENTITIES))
+        elif roll < 0.12:
+            parts.append(rng.choice(EMOJI))
+        else:
+            parts.append(_word(rng) + (rng.choice(PUNCTUATION) if roll > 0.9 else ""))
+    if rng.random() < 0.2:
+        parts.append(f"http://t.co/{rng.getrandbits(40):x}")
+    return " ".join(parts)
+
+
+def make_corpus(rows: int, seed: int = 0, repeat_rate: float = 0.1) -> list:
+    """rows tweets, a repeat_rate share of them copies of earlier ones."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(rows):
+        if corpus and rng.random() < repeat_rate:
+            corpus.append(rng.choice(corpus))
+        else:
+            corpus.append(make_tweet(rng))
+    return corpus
@@ -1,5 +1,6 @@
 from hate_speech_detection.exception import CustomException
 from hate_speech_detection.configuration.gcloud_syncer import GCloudSync
+from hate_speech_detection.logger import setup_logging
 
 
 # def divide(a, b):
@@ -17,5 +18,6 @@ from hate_speech_detection.configuration.gcloud_syncer import GCloudSync
 #     print(ce)
 
 
+setup_logging()
 sync = GCloudSync()
 sync.sync_folder_from_gcloud("hate-speech-detection", ".")
@@ -1,3 +1,4 @@
+from dataclasses import asdict
 from zipfile import ZipFile, BadZipFile
 from hate_speech_detection.exception.exception import (
     DataIngestionError,
@@ -6,6 +7,7 @@ from hate_speech_detection.exception.exception import (
 from hate_speech_detection.logger.logger import logger
 from hate_speech_detection.configuration.gcloud_syncer import GCloudSync
 from hate_speech_detection.entity.config_entity import DataIngestionConfig
+from hate_speech_detection.entity.artifact_entity import StageSpec
 
 
 class DataIngestion:
@@ -13,6 +15,26 @@ class DataIngestion:
         self.config = data_ingestion_config
         self.gcloud = GCloudSync()
 
+    def stage_spec(self) -> StageSpec:
+        # The bucket listing stands in for input files, so new or rewritten
+        # remote data changes the fingerprint. When the bucket cannot be
+        # listed the stage is not cached and always runs.
+        params = asdict(self.config)
+        try:
+            params["remote_fingerprint"] = self.gcloud.fingerprint_gcloud_folder(
+                self.config.bucket_data_dir
+            )
+            cacheable = True
+        except GCloudSyncError as e:
+            logger.warning(f"Bucket not listed, data ingestion is not cached: {e}")
+            cacheable = False
+        return StageSpec(
+            name="data_ingestion",
+            params=params,
+            outputs=[self.config.imbalanced_data_path, self.config.raw_data_path],
+            cacheable=cacheable,
+        )
+
     def get_data_from_gcloud(self):
         try:
             logger.info(
@@ -0,0 +1,90 @@
+import json
+import numpy as np
+from pathlib import Path
+from sklearn.model_selection import train_test_split
+from hate_speech_detection.entity.config_entity import (
+    ModelTrainerConfig,
+    DataTransformationConfig,
+)
+from hate_speech_detection.logger.logger import logger
+from hate_speech_detection.utils.common_utils import file_hash
+from hate_speech_detection.utils.dataframe_io import load_dataframe
+
+
+class DataSplitter:
+    """
+    Splits the transformed data into train and test sets for both the
+    trainer and the evaluator.
+
+    The row indices of the split are persisted together with the hash of the
+    data file, test_split and random_state. As long as these match, every
+    consumer gets exactly the same held-out rows without splitting again.
+    """
+
+    def __init__(
+        self,
+        model_trainer_config: ModelTrainerConfig,
+        data_transformation_config: DataTransformationConfig,
+    ):
+        self.train_config = model_trainer_config
+        self.trans_config = data_transformation_config
+
+    def _load_data(self):
+        tweet = self.trans_config.tweet_column
+        label = self.trans_config.label_column
+        df = load_dataframe(
+            self.trans_config.transformed_file_path, columns=[tweet, label]
+        )
+        df = df.dropna()
+        # CSV reads empty tweets back as NaN, Parquet keeps them as ""
+        df = df[df[tweet] != ""]
+        return df[tweet], df[label]
+
+    def _split_key(self) -> dict:
+        return {
+            "data_hash": file_hash(self.trans_config.transformed_file_path),
+            "test_split": self.train_config.test_split,
+            "random_state": self.train_config.random_state,
+        }
+
+    def _load_indices(self, key: dict):
+        split_path = Path(self.train_config.split_path)
+        if not split_path.is_file():
+            return None
+        with np.load(split_path) as split:
+            if json.loads(str(split["key"])) != key:
+                return None
+            return split["train"], split["test"]
+
+    def _save_indices(self, key: dict, train_idx, test_idx):
+        np.savez(
+            self.train_config.split_path,
+            key=json.dumps(key, sort_keys=True),
+            train=train_idx,
+            test=test_idx,
+        )
+
+    def get_split(self):
+        X, y = self._load_data()
+        logger.info(f"Data cardinality (X,y) : ({len(X)}, {len(y)})")
+
+        key = self._split_key()
+        indices = self._load_indices(key)
+        if indices is None:
+            logger.info("Splitting data into train and test sets...")
+            indices = train_test_split(
+                np.arange(len(X)),
+                test_size=self.train_config.test_split,
+                random_state=self.train_config.random_state,
+            )
+            self._save_indices(key, *indices)
+        else:
+            logger.info(f"Reusing train/test split: {self.train_config.split_path}")
+
+        train_idx, test_idx = indices
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+        logger.info(
+            f"Data splitting completed - X_train: {X_train.shape}, X_test: {X_test.shape}, y_train: {y_train.shape}, y_test: {y_test.shape}"
+        )
+        return X_train, X_test, y_train, y_test
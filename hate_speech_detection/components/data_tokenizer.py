@@ -1,26 +1,137 @@
+import itertools
+import math
+import os
+import shutil
 import tensorflow as tf
 from keras.layers import TextVectorization
+from hate_speech_detection.components.vocabulary_builder import VocabularyBuilder
 from hate_speech_detection.entity.config_entity import ModelTrainerConfig
 from hate_speech_detection.logger.logger import logger
 
 
 class DataTokenizer:
+    NGRAMS = (1, 4)
+
     def __init__(self, model_trainer_config: ModelTrainerConfig):
         self.train_config = model_trainer_config
 
-    def tokenize(self, X_data):
-        logger.info("Tokenizing text data...")
-        vectorize_layer = TextVectorization(
+    def _new_layer(self) -> TextVectorization:
+        return TextVectorization(
             max_tokens=self.train_config.max_words,
             output_mode="int",
             output_sequence_length=self.train_config.max_len,
-            ngrams=(1, 4),
+            ngrams=self.NGRAMS,
+        )
+
+    def _build_vocabulary(self, X_data) -> list:
+        builder = VocabularyBuilder(
+            max_tokens=self.train_config.max_words,
+            ngrams=self.NGRAMS,
+            counter_capacity=self.train_config.vocab_counter_capacity,
+            sample_fraction=self.train_config.vocab_sample_fraction,
+            random_state=self.train_config.random_state,
+            incremental=self.train_config.vocab_incremental,
+            seen_capacity=self.train_config.vocab_seen_capacity,
         )
+        counts_path = self.train_config.vocab_counts_path
+        incremental = self.train_config.vocab_incremental
+        if incremental and os.path.exists(counts_path):
+            builder.load(counts_path)
+        builder.update(X_data)
+        # Only an incremental run reads the counts back
+        if incremental:
+            builder.save(counts_path)
+        return builder.vocabulary()
+
+    def adapt(self, X_data) -> TextVectorization:
+        vectorize_layer = self._new_layer()
+        if self.train_config.vocab_mode == "streaming":
+            logger.info("Building vocabulary from streamed n-gram counts...")
+            vectorize_layer.set_vocabulary(self._build_vocabulary(X_data))
+            return vectorize_layer
+
+        logger.info("Adapting text vectorization layer...")
         ds = tf.data.Dataset.from_tensor_slices(X_data).batch(
             self.train_config.batch_size
         )
         vectorize_layer.adapt(ds)
+        return vectorize_layer
+
+    def tokenize(self, X_data):
+        logger.info("Tokenizing text data...")
+        vectorize_layer = self.adapt(X_data)
         X_data_vectorized = vectorize_layer(X_data)
 
         logger.info("Text data tokenization completed.")
         return X_data_vectorized, vectorize_layer
+
+    def make_datasets(self, X_data, y_data, vectorize_layer):
+        """
+        Builds training and validation tf.data pipelines that vectorize text
+        batches in parallel instead of materializing the whole vectorized set.
+
+        Like Keras' validation_split, the last test_split fraction of the rows
+        is held out. Rows are fed from generators over the Python strings: a
+        fixed-width numpy array would pad every text to the longest one, and
+        from_tensor_slices would embed the whole set in the graph.
+        """
+        batch_size = self.train_config.batch_size
+        autotune = tf.data.AUTOTUNE
+
+        def vectorize(texts, labels):
+            return vectorize_layer(texts), labels
+
+        texts = X_data.astype(str).tolist()
+        labels = y_data.tolist()
+        signature = (
+            tf.TensorSpec(shape=(), dtype=tf.string),
+            tf.TensorSpec(shape=(), dtype=tf.as_dtype(y_data.to_numpy().dtype)),
+        )
+
+        def rows(start, stop):
+            return tf.data.Dataset.from_generator(
+                lambda: zip(
+                    itertools.islice(texts, start, stop),
+                    itertools.islice(labels, start, stop),
+                ),
+                output_signature=signature,
+            )
+
+        split_at = int(math.ceil(len(texts) * (1.0 - self.train_config.test_split)))
+        train_ds, val_ds = rows(0, split_at), rows(split_at, len(texts))
+
+        shuffle_buffer = self.train_config.shuffle_buffer
+        seed = self.train_config.random_state
+        cache = self.train_config.dataset_cache
+        if cache == "none":
+            train_ds = (
+                train_ds.shuffle(shuffle_buffer, seed=seed)
+                .batch(batch_size)
+                .map(vectorize, num_parallel_calls=autotune)
+            )
+        else:
+            # Vectorize once, then reshuffle the cached rows every epoch
+            cache_path = ""
+            if cache == "disk":
+                # A cache left by a previous run would be read back as is
+                cache_dir = os.path.join(self.train_config.artifacts_dir, "tf_cache")
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                os.makedirs(cache_dir)
+                cache_path = os.path.join(cache_dir, "train")
+            train_ds = (
+                train_ds.batch(batch_size)
+                .map(vectorize, num_parallel_calls=autotune)
+                .unbatch()
+                .cache(cache_path)
+                .shuffle(shuffle_buffer, seed=seed)
+                .batch(batch_size)
+            )
+
+        val_ds = val_ds.batch(batch_size).map(vectorize, num_parallel_calls=autotune)
+        if cache != "none":
+            val_ds = val_ds.cache()
+
+        logger.info(
+            f"tf.data pipelines ready - train rows: {split_at}, validation rows: {len(X_data) - split_at}"
+        )
+        return train_ds.prefetch(autotune), val_ds.prefetch(autotune)
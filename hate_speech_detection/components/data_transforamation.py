@@ -1,19 +1,37 @@
+import os
 from pathlib import Path
 import re
-import string
-import emoji
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import nltk
-from nltk.corpus import stopwords
-
-nltk.download("stopwords")
 from hate_speech_detection.entity.config_entity import (
     DataIngestionConfig,
     DataTransformationConfig,
 )
 
+from hate_speech_detection.entity.artifact_entity import StageSpec
 from hate_speech_detection.exception.exception import DataTransformationError
 from hate_speech_detection.logger.logger import logger
+from hate_speech_detection.components.text_cleaner import TextCleaner
+from hate_speech_detection.components.data_validator import DataValidator
+from hate_speech_detection.utils.dataframe_io import DataFrameWriter, save_dataframe
+
+
+# Cleaner of a worker process, built once by the pool initializer
+_worker_cleaner = None
+
+
+def _init_cleaning_worker(
+    language: str, more_stopwords: list, stem_cache_size: int, stopwords_dir: str
+):
+    global _worker_cleaner
+    _worker_cleaner = TextCleaner(
+        language, more_stopwords, stem_cache_size, stopwords_dir
+    )
+
+
+def _clean_chunk(texts: list) -> list:
+    return _worker_cleaner.clean_batch(texts)
 
 
 class DataTransformation:
@@ -24,6 +42,31 @@ class DataTransformation:
     ):
         self.trans_config = data_transformation_config
         self.ingest_config = data_ingestion_config
+        self.cleaner = TextCleaner(
+            self.trans_config.language,
+            self.trans_config.more_stopwords,
+            self.trans_config.stem_cache_size,
+            self.trans_config.stopwords_dir,
+        )
+
+    def stage_spec(self) -> StageSpec:
+        return StageSpec(
+            name="data_transformation",
+            inputs=[
+                self.ingest_config.imbalanced_data_path,
+                self.ingest_config.raw_data_path,
+            ],
+            params={
+                "drop_columns": self.trans_config.drop_columns,
+                "class_column": self.trans_config.class_column,
+                "label_column": self.trans_config.label_column,
+                "tweet_column": self.trans_config.tweet_column,
+                "language": self.trans_config.language,
+                "more_stopwords": self.trans_config.more_stopwords,
+                "artifact_compression": self.trans_config.artifact_compression,
+            },
+            outputs=[self.trans_config.transformed_file_path],
+        )
 
     def _fix_broken_csv(self, input_path: str, output_path: str) -> None:
         """
@@ -72,6 +115,9 @@ class DataTransformation:
         # self._fix_broken_csv(input_path, fixed_path)
 
         imbalanced_df = pd.read_csv(self.ingest_config.imbalanced_data_path)
+        return self._prepare_imbalanced_frame(imbalanced_df)
+
+    def _prepare_imbalanced_frame(self, imbalanced_df: pd.DataFrame) -> pd.DataFrame:
         imbalanced_df = imbalanced_df[
             [self.trans_config.label_column, self.trans_config.tweet_column]
         ]
@@ -85,7 +131,10 @@ class DataTransformation:
         # self._fix_broken_csv(input_path, fixed_path)
 
         raw_df = pd.read_csv(self.ingest_config.raw_data_path)
-        raw_df = raw_df.drop(columns=self.trans_config.drop_columns, axis=1)
+        return self._prepare_raw_frame(raw_df)
+
+    def _prepare_raw_frame(self, raw_df: pd.DataFrame) -> pd.DataFrame:
+        raw_df = raw_df.drop(columns=self.trans_config.drop_columns)
         class_column = self.trans_config.class_column
         label_column = self.trans_config.label_column
         raw_df.loc[raw_df[class_column] == 0, class_column] = 1
@@ -101,32 +150,116 @@ class DataTransformation:
         # combined_df = combined_df.sample(frac=1).reset_index(drop=True)
         return combined_df
 
+    def _with_int8_labels(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Stores the labels as int8, dropping the rows whose label is missing
+        or not a number, which the cast would fail on. The index is reset.
+        """
+        label = self.trans_config.label_column
+        labels = pd.to_numeric(frame[label], errors="coerce")
+        invalid = labels.isna()
+        if invalid.any():
+            logger.warning(
+                f"Dropping {int(invalid.sum())} rows without a valid {label}"
+            )
+            frame, labels = frame[~invalid], labels[~invalid]
+        frame = frame.reset_index(drop=True)
+        frame[label] = labels.to_numpy().astype("int8")
+        return frame
+
     def data_cleaning(self, words: str) -> str:
-        language = self.trans_config.language
-        stemmer = nltk.SnowballStemmer(language)
-        stop_words = stopwords.words(language)
-        more_stopwords = self.trans_config.more_stopwords
-        stop_words += more_stopwords
-
-        words = str(words).lower()
-        words = re.sub(r"\[.*?\]", "", words)
-        words = re.sub(r"https?://\S+|www\.\S+", "", words)
-        words = re.sub(r"<.*?>+", "", words)
-        words = re.sub(r"[%s]" % re.escape(string.punctuation), "", words)
-        words = re.sub(r"\n", "", words)
-        words = re.sub(r"\w*\d\w*", "", words)
-        words = [word for word in words.split(" ") if word not in stop_words]
-        words = " ".join(words)
-        words = [stemmer.stem(words) for word in words.split(" ")]
-        words = " ".join(words)
-        return words
+        return self.cleaner.clean(words)
+
+    def _cleaning_pool(self):
+        """
+        Process pool for cleaning when more than one worker is configured,
+        otherwise a context yielding None.
+        """
+        workers = self.trans_config.num_workers or os.cpu_count()
+        if workers <= 1:
+            return nullcontext()
+        logger.info(f"Cleaning tweets with {workers} worker processes")
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_cleaning_worker,
+            initargs=(
+                self.trans_config.language,
+                self.trans_config.more_stopwords,
+                self.trans_config.stem_cache_size,
+                self.trans_config.stopwords_dir,
+            ),
+        )
+
+    def _clean_tweets(self, tweets: pd.Series, pool=None) -> pd.Series:
+        """
+        Cleans the tweet column, split into chunks over the process pool when
+        one is given. Results keep the input order.
+        """
+        chunk_size = self.trans_config.chunk_size
+        if pool is None or len(tweets) <= chunk_size:
+            return self.cleaner.clean_batch(tweets)
+
+        chunks = [
+            tweets.iloc[start : start + chunk_size].tolist()
+            for start in range(0, len(tweets), chunk_size)
+        ]
+        cleaned = []
+        for chunk in pool.map(_clean_chunk, chunks):
+            cleaned.extend(chunk)
+        return pd.Series(cleaned, index=tweets.index, name=tweets.name)
+
+    def _iter_prepared_chunks(self):
+        chunk_size = self.trans_config.read_chunk_size
+        sources = [
+            (self.ingest_config.imbalanced_data_path, self._prepare_imbalanced_frame),
+            (self.ingest_config.raw_data_path, self._prepare_raw_frame),
+        ]
+        for file_path, prepare in sources:
+            logger.info(f"Streaming {file_path} in chunks of {chunk_size} rows...")
+            for chunk in DataValidator(file_path).iter_chunks(chunk_size):
+                yield prepare(chunk)
+
+    def _transform_in_chunks(self):
+        """
+        Validates, relabels, cleans and appends the input files one chunk at a
+        time, so peak memory depends on read_chunk_size, not on the data size.
+        The output matches the in-memory path: one running index, one header.
+        """
+        label = self.trans_config.label_column
+        tweet = self.trans_config.tweet_column
+        rows = 0
+
+        with self._cleaning_pool() as pool, DataFrameWriter(
+            self.trans_config.transformed_file_path,
+            self.trans_config.artifact_compression,
+        ) as writer:
+            for chunk in self._iter_prepared_chunks():
+                chunk = self._with_int8_labels(chunk[[label, tweet]])
+                chunk.index += rows
+                chunk[tweet] = self._clean_tweets(chunk[tweet], pool)
+                writer.write(chunk)
+                rows += len(chunk)
+
+        logger.info(
+            f"Transformed {rows} rows in chunks: {self.trans_config.transformed_file_path}"
+        )
 
     def initiate_data_transformation(self):
         try:
             logger.info("Initiate data transformation...")
-            df = self._clean_and_concat_dataframes()
-            tweet = self.trans_config.tweet_column
-            df[tweet] = df[tweet].apply(self.data_cleaning)
-            df.to_csv(self.trans_config.transformed_file_path, encoding="utf-8")
+            if self.trans_config.streaming:
+                self._transform_in_chunks()
+            else:
+                df = self._with_int8_labels(self._clean_and_concat_dataframes())
+                tweet = self.trans_config.tweet_column
+                with self._cleaning_pool() as pool:
+                    df[tweet] = self._clean_tweets(df[tweet], pool)
+                save_dataframe(
+                    df,
+                    self.trans_config.transformed_file_path,
+                    self.trans_config.artifact_compression,
+                )
+            if self.cleaner.stem_cache is not None:
+                logger.info(f"Stem cache: {self.cleaner.stem_cache.stats()}")
         except Exception as e:
             raise DataTransformationError(e) from e
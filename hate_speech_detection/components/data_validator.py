@@ -1,6 +1,8 @@
+import os
 import pandas as pd
 from hate_speech_detection.exception.exception import DataValidationError
 from hate_speech_detection.logger.logger import logger
+from hate_speech_detection.entity.artifact_entity import StageSpec
 
 
 class DataValidator:
@@ -36,12 +38,17 @@ class DataValidator:
         else:
             raise DataValidationError("Unknown CSV type based on filename.")
 
-    def validate(self) -> pd.DataFrame:
-        try:
-            df = pd.read_csv(self.file_path)
-        except Exception as e:
-            raise DataValidationError(f"CSV loading error: {e}") from e
+    def stage_spec(self) -> StageSpec:
+        return StageSpec(
+            name=f"data_validation:{os.path.basename(self.file_path)}",
+            inputs=[self.file_path],
+            params={
+                "required_columns": self.required_columns,
+                "int_cols": self.int_cols,
+            },
+        )
 
+    def _validate_frame(self, df: pd.DataFrame):
         # Check required columns
         missing_cols = [col for col in self.required_columns if col not in df.columns]
         if missing_cols:
@@ -59,5 +66,32 @@ class DataValidator:
             if not pd.api.types.is_integer_dtype(df[col]):
                 raise DataValidationError(f"Column {col} is not of integer type.")
 
+    def validate(self) -> pd.DataFrame:
+        try:
+            df = pd.read_csv(self.file_path)
+        except Exception as e:
+            raise DataValidationError(f"CSV loading error: {e}") from e
+
+        self._validate_frame(df)
+
         logger.info(f"CSV validation succeeded: {self.file_path}")
         return df
+
+    def iter_chunks(self, chunk_size: int):
+        """
+        Reads the CSV in chunks of chunk_size rows and yields each chunk once
+        it has passed validation, so the file is never fully in memory.
+        """
+        try:
+            reader = pd.read_csv(self.file_path, chunksize=chunk_size)
+        except Exception as e:
+            raise DataValidationError(f"CSV loading error: {e}") from e
+
+        rows = 0
+        with reader:
+            for chunk in reader:
+                self._validate_frame(chunk)
+                rows += len(chunk)
+                yield chunk
+
+        logger.info(f"CSV validation succeeded: {self.file_path} ({rows} rows)")
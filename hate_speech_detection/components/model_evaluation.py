@@ -1,11 +1,17 @@
+import os
+import json
 import shutil
 import keras
-import pickle
-import pandas as pd
+import numpy as np
 from pathlib import Path
 from sklearn.metrics import confusion_matrix
 from hate_speech_detection.logger.logger import logger
-from hate_speech_detection.exception.exception import ModelEvaluationError
+from hate_speech_detection.components.data_splitter import DataSplitter
+from hate_speech_detection.exception.exception import (
+    ModelEvaluationError,
+    GCloudSyncError,
+)
+from hate_speech_detection.entity.artifact_entity import StageSpec
 from hate_speech_detection.entity.config_entity import (
     ModelEvaluationConfig,
     ModelTrainerConfig,
@@ -13,7 +19,13 @@ from hate_speech_detection.entity.config_entity import (
     PredictionConfig,
 )
 from hate_speech_detection.configuration.gcloud_syncer import GCloudSync
-from sklearn.model_selection import train_test_split
+from hate_speech_detection.ml.numpy_lstm import (
+    MANIFEST_NAME,
+    NumpyLSTMModel,
+    export_weights,
+    quantize_export,
+)
+from hate_speech_detection.ml.vectorizer import TextVectorizer
 
 
 class ModelEvaluation:
@@ -30,39 +42,66 @@ class ModelEvaluation:
         self.pred_config = prediction_config
         self.gcloud = GCloudSync()
 
-    def _split_data(self):
-        logger.info("Splitting data into train and test sets...")
-        df = pd.read_csv(self.trans_config.transformed_file_path)
-        df = df.dropna()
-        X = df[self.trans_config.tweet_column]
-        y = df[self.trans_config.label_column]
-
-        logger.info(f"Data cardinality (X,y) : ({len(X)}, {len(y)})")
-
-        X_train, X_test, y_train, y_test = train_test_split(
-            X,
-            y,
-            test_size=self.train_config.test_split,
-            random_state=self.train_config.random_state,
-        )
-        logger.info(
-            f"Data splitting completed - X_train: {X_train.shape}, X_test: {X_test.shape}, y_train: {y_train.shape}, y_test: {y_test.shape}"
+    def stage_spec(self) -> StageSpec:
+        # The evaluation compares against the best model in the bucket and
+        # may upload over it, so the bucket listing is an input too. When
+        # the bucket cannot be listed the stage is not cached and always runs.
+        params = {
+            "bucket_best_dir": self.eval_config.bucket_best_dir,
+            "test_split": self.train_config.test_split,
+            "random_state": self.train_config.random_state,
+            "numpy_tolerance": self.pred_config.numpy_tolerance,
+            "numpy_converge_tol": self.pred_config.numpy_converge_tol,
+            "numpy_bucket_size": self.pred_config.numpy_bucket_size,
+            "quantize_keep_tokens": self.pred_config.quantize_keep_tokens,
+            "quantized_max_accuracy_drop": (
+                self.pred_config.quantized_max_accuracy_drop
+            ),
+        }
+        try:
+            params["remote_fingerprint"] = self.gcloud.fingerprint_gcloud_folder(
+                self.eval_config.bucket_best_dir
+            )
+            cacheable = True
+        except GCloudSyncError as e:
+            logger.warning(f"Bucket not listed, model evaluation is not cached: {e}")
+            cacheable = False
+        return StageSpec(
+            name="model_evaluation",
+            inputs=[
+                self.trans_config.transformed_file_path,
+                self.train_config.trained_model_path,
+                self.train_config.tokenizer_path,
+                self.train_config.tokenizer_config_path,
+                self.train_config.vocab_path,
+            ],
+            params=params,
+            outputs=[
+                self.pred_config.model_path,
+                self.pred_config.tokenizer_path,
+                self.pred_config.tokenizer_config_path,
+                self.pred_config.vocab_path,
+                os.path.join(self.pred_config.numpy_model_path, MANIFEST_NAME),
+                os.path.join(self.pred_config.quantized_model_path, MANIFEST_NAME),
+                self.eval_config.quantization_report_path,
+            ],
+            cacheable=cacheable,
         )
-        return X_train, X_test, y_train, y_test
 
-    def _evaluate(self, model):
-        _, X_test, _, y_test = self._split_data()
+    def _load_test_set(self):
+        splitter = DataSplitter(self.train_config, self.trans_config)
+        _, X_test, _, y_test = splitter.get_split()
 
         # X_test = pd.read_csv(self.train_config.x_test_path, encoding="utf-8")
         # y_test = pd.read_csv(self.train_config.y_test_path, encoding="utf-8")
         # X_test = X_test.astype(str).squeeze()
         # y_test = y_test.squeeze()
 
-        with open(self.train_config.tokenizer_path, "rb") as f:
-            load_tokenizer = pickle.load(f)
-
-        X_test_vec = load_tokenizer(X_test)
+        vectorizer = TextVectorizer.load(self.train_config.tokenizer_config_path)
+        X_test_vec = vectorizer(X_test)
+        return X_test_vec, y_test
 
+    def _evaluate(self, model, X_test_vec, y_test):
         accuracy = model.evaluate(X_test_vec, y_test)
         logger.info(f"Loss & accuracy: {accuracy}")
 
@@ -101,29 +140,122 @@ class ModelEvaluation:
             shutil.copy2(
                 self.eval_config.best_model_path, self.pred_config.artifacts_dir
             )
-        logger.info(
-            f"Copying {self.train_config.tokenizer_path} to {self.pred_config.artifacts_dir}"
+        for tokenizer_path in [
+            self.train_config.tokenizer_path,
+            self.train_config.vocab_path,
+            # Last, the registry picks the tokenizer up by this file
+            self.train_config.tokenizer_config_path,
+        ]:
+            logger.info(f"Copying {tokenizer_path} to {self.pred_config.artifacts_dir}")
+            shutil.copy2(tokenizer_path, self.pred_config.artifacts_dir)
+
+    def _export_numpy_model(self, model, X_test_vec, sample_size: int = 512):
+        """
+        Exports the served model for the NumPy engine and checks it against
+        Keras on part of the test set. A mismatching export is removed, so
+        the registry keeps serving with Keras.
+        """
+        export_dir = self.pred_config.numpy_model_path
+        logger.info(f"Exporting NumPy weights to {export_dir}")
+        export_weights(model, export_dir)
+
+        sample = np.asarray(X_test_vec[:sample_size])
+        numpy_model = NumpyLSTMModel.load(
+            export_dir,
+            converge_tol=self.pred_config.numpy_converge_tol,
+            bucket_size=self.pred_config.numpy_bucket_size,
+        )
+        numpy_pred = numpy_model.predict(sample)
+        keras_pred = model.predict(sample, batch_size=128, verbose=0)
+        max_diff = float(np.max(np.abs(numpy_pred - keras_pred), initial=0.0))
+        logger.info(f"NumPy engine max difference to Keras: {max_diff:.2e}")
+        if max_diff > self.pred_config.numpy_tolerance:
+            logger.error(
+                f"NumPy export differs from Keras by {max_diff:.2e} (tolerance {self.pred_config.numpy_tolerance}), removing it"
+            )
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+    def _export_quantized_model(self, X_test_vec, y_test):
+        """
+        Writes the int8, optionally pruned, copy of the NumPy export and a
+        report of its test accuracy against the float32 export. An export
+        losing more than quantized_max_accuracy_drop accuracy is removed.
+        """
+        source_dir = self.pred_config.numpy_model_path
+        export_dir = self.pred_config.quantized_model_path
+        if not os.path.exists(os.path.join(source_dir, MANIFEST_NAME)):
+            logger.warning("No NumPy export to quantize")
+            return
+
+        # Rows past the vocabulary are never looked up
+        num_tokens = len(
+            TextVectorizer.load(self.train_config.tokenizer_config_path).vocabulary
+        )
+        if self.pred_config.quantize_keep_tokens > 0:
+            num_tokens = min(num_tokens, self.pred_config.quantize_keep_tokens)
+        logger.info(f"Exporting int8 weights with {num_tokens} tokens to {export_dir}")
+        quantize_export(source_dir, export_dir, num_tokens=num_tokens)
+
+        options = dict(
+            converge_tol=self.pred_config.numpy_converge_tol,
+            bucket_size=self.pred_config.numpy_bucket_size,
+        )
+        float_pred = NumpyLSTMModel.load(source_dir, **options).predict(X_test_vec)
+        int8_pred = NumpyLSTMModel.load(export_dir, **options).predict(X_test_vec)
+        labels = np.asarray(y_test).reshape(-1, 1)
+        float_accuracy = float(np.mean((float_pred > 0.5) == labels))
+        int8_accuracy = float(np.mean((int8_pred > 0.5) == labels))
+
+        def export_size(directory):
+            return sum(entry.stat().st_size for entry in os.scandir(directory))
+
+        report = {
+            "test_rows": len(labels),
+            "num_tokens": num_tokens,
+            "float32_accuracy": float_accuracy,
+            "int8_accuracy": int8_accuracy,
+            "accuracy_delta": int8_accuracy - float_accuracy,
+            "label_agreement": float(np.mean((float_pred > 0.5) == (int8_pred > 0.5))),
+            "max_abs_diff": float(np.max(np.abs(float_pred - int8_pred), initial=0.0)),
+            "float32_bytes": export_size(source_dir),
+            "int8_bytes": export_size(export_dir),
+        }
+        report["accepted"] = (
+            float_accuracy - int8_accuracy
+            <= self.pred_config.quantized_max_accuracy_drop
         )
-        shutil.copy2(self.train_config.tokenizer_path, self.pred_config.artifacts_dir)
+        report_path = self.eval_config.quantization_report_path
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Quantization report: {report}")
+        if not report["accepted"]:
+            logger.error("int8 export loses too much accuracy, removing it")
+            shutil.rmtree(export_dir, ignore_errors=True)
 
     def initiate_model_evaluation(self):
         try:
+            X_test_vec, y_test = self._load_test_set()
             load_model = keras.models.load_model(self.train_config.trained_model_path)
-            trained_accuracy = self._evaluate(model=load_model)
+            trained_accuracy = self._evaluate(load_model, X_test_vec, y_test)
             is_trained_model_accepted = False
+            served_model = load_model
             self._get_best_model_from_gcloud()
 
             best_model_path = Path(self.eval_config.best_model_path)
             if best_model_path.exists() and best_model_path.is_file():
                 best_model = keras.models.load_model(self.eval_config.best_model_path)
-                best_model_accuracy = self._evaluate(best_model)
+                best_model_accuracy = self._evaluate(best_model, X_test_vec, y_test)
 
                 if trained_accuracy[1] > best_model_accuracy[1]:
                     is_trained_model_accepted = True
                     self._push_best_model_to_gcloud()
+                else:
+                    served_model = best_model
 
             logger.info(f"Is trained model accepted: {is_trained_model_accepted}")
             self._copy_prediction_artifacts(is_trained_model_accepted)
+            self._export_numpy_model(served_model, X_test_vec)
+            self._export_quantized_model(X_test_vec, y_test)
 
         except Exception as e:
             raise ModelEvaluationError(e) from e
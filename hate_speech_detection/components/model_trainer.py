@@ -1,16 +1,18 @@
 import pickle
 import io
 from sre_parse import Tokenizer
-import pandas as pd
-from sklearn.model_selection import train_test_split
 from hate_speech_detection.components.data_tokenizer import DataTokenizer
+from hate_speech_detection.components.data_splitter import DataSplitter
 from hate_speech_detection.logger.logger import logger
+from hate_speech_detection.utils.dataframe_io import save_dataframe
 from hate_speech_detection.exception.exception import ModelTrainingError
+from hate_speech_detection.entity.artifact_entity import StageSpec
 from hate_speech_detection.entity.config_entity import (
     ModelTrainerConfig,
     DataTransformationConfig,
 )
 from hate_speech_detection.ml.model import ModelArchitecture
+from hate_speech_detection.ml.vectorizer import TextVectorizer
 
 
 class ModelTrainer:
@@ -19,57 +21,92 @@ class ModelTrainer:
         self,
         model_trainer_config: ModelTrainerConfig,
         data_transformation_config: DataTransformationConfig,
+        callbacks=None,
     ):
         self.train_config = model_trainer_config
         self.trans_config = data_transformation_config
+        self.callbacks = callbacks or []
 
-    def _split_data(self):
-        logger.info("Splitting data into train and test sets...")
-        df = pd.read_csv(self.trans_config.transformed_file_path)
-        df = df.dropna()
-        X = df[self.trans_config.tweet_column]
-        y = df[self.trans_config.label_column]
-
-        logger.info(f"Data cardinality (X,y) : ({len(X)}, {len(y)})")
-
-        X_train, X_test, y_train, y_test = train_test_split(
-            X,
-            y,
-            test_size=self.train_config.test_split,
-            random_state=self.train_config.random_state,
+    def stage_spec(self) -> StageSpec:
+        return StageSpec(
+            name="model_trainer",
+            inputs=[self.trans_config.transformed_file_path],
+            params={
+                "tweet_column": self.trans_config.tweet_column,
+                "label_column": self.trans_config.label_column,
+                "random_state": self.train_config.random_state,
+                "epochs": self.train_config.epochs,
+                "batch_size": self.train_config.batch_size,
+                "test_split": self.train_config.test_split,
+                "max_words": self.train_config.max_words,
+                "max_len": self.train_config.max_len,
+                "loss": self.train_config.loss,
+                "metrics": self.train_config.metrics,
+                "activation": self.train_config.activation,
+                "use_tf_data": self.train_config.use_tf_data,
+                "shuffle_buffer": self.train_config.shuffle_buffer,
+                "vocab_mode": self.train_config.vocab_mode,
+                "vocab_counter_capacity": self.train_config.vocab_counter_capacity,
+                "vocab_sample_fraction": self.train_config.vocab_sample_fraction,
+                "vocab_incremental": self.train_config.vocab_incremental,
+                "vocab_seen_capacity": self.train_config.vocab_seen_capacity,
+            },
+            outputs=[
+                self.train_config.trained_model_path,
+                self.train_config.tokenizer_path,
+                self.train_config.tokenizer_config_path,
+                self.train_config.vocab_path,
+                self.train_config.split_path,
+                self.train_config.x_train_path,
+                self.train_config.y_train_path,
+                self.train_config.x_test_path,
+                self.train_config.y_test_path,
+                self.train_config.vocab_counts_path,
+            ],
         )
-        logger.info(
-            f"Data splitting completed - X_train: {X_train.shape}, X_test: {X_test.shape}, y_train: {y_train.shape}, y_test: {y_test.shape}"
-        )
-        return X_train, X_test, y_train, y_test
 
     def initiate_model_trainer(self):
         try:
             logger.info("Model training started...")
-            X_train, X_test, y_train, y_test = self._split_data()
+            splitter = DataSplitter(self.train_config, self.trans_config)
+            X_train, X_test, y_train, y_test = splitter.get_split()
 
-            X_train.to_csv(
-                self.train_config.x_train_path, index=False, encoding="utf-8"
-            )
-            y_train.to_csv(
-                self.train_config.y_train_path, index=False, encoding="utf-8"
-            )
-            X_test.to_csv(self.train_config.x_test_path, index=False, encoding="utf-8")
-            y_test.to_csv(self.train_config.y_test_path, index=False, encoding="utf-8")
+            compression = self.trans_config.artifact_compression
+            for data, path in [
+                (X_train, self.train_config.x_train_path),
+                (y_train, self.train_config.y_train_path),
+                (X_test, self.train_config.x_test_path),
+                (y_test, self.train_config.y_test_path),
+            ]:
+                save_dataframe(data.to_frame(), path, compression, index=False)
 
             tokenizer = DataTokenizer(self.train_config)
-            X_train, vectorizer = tokenizer.tokenize(X_train)
-
             model_architecture = ModelArchitecture(self.train_config)
-            model = model_architecture.get_model()
 
-            model.fit(
-                X_train,
-                y_train,
-                batch_size=self.train_config.batch_size,
-                epochs=self.train_config.epochs,
-                validation_split=self.train_config.test_split,
-            )
+            if self.train_config.use_tf_data:
+                vectorizer = tokenizer.adapt(X_train)
+                train_ds, val_ds = tokenizer.make_datasets(
+                    X_train, y_train, vectorizer
+                )
+                model = model_architecture.get_model()
+                model.fit(
+                    train_ds,
+                    validation_data=val_ds,
+                    epochs=self.train_config.epochs,
+                    shuffle=False,  # the training dataset shuffles itself
+                    callbacks=self.callbacks,
+                )
+            else:
+                X_train, vectorizer = tokenizer.tokenize(X_train)
+                model = model_architecture.get_model()
+                model.fit(
+                    X_train,
+                    y_train,
+                    batch_size=self.train_config.batch_size,
+                    epochs=self.train_config.epochs,
+                    validation_split=self.train_config.test_split,
+                    callbacks=self.callbacks,
+                )
 
             model.summary(print_fn=lambda x: logger.info(x))
 
@@ -77,6 +114,9 @@ class ModelTrainer:
 
             with io.open(self.train_config.tokenizer_path, "wb") as f:
                 pickle.dump(vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
+            TextVectorizer.from_layer(vectorizer).save(
+                self.train_config.tokenizer_config_path, self.train_config.vocab_path
+            )
 
             logger.info("Model training finished...")
         except Exception as e:
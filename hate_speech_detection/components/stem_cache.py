@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+
+
+class StemCache:
+    """
+    Snowball stemmer with a bounded LRU cache of its results.
+
+    Exposes the same stem() method as the stemmer it wraps, so it can be used
+    as a drop-in replacement. Safe to share between threads. The stemmer (and
+    NLTK) is only loaded on the first cache miss or by load_stemmer().
+
+    TextCleaner stems the whole filtered text, so entries are keyed by text,
+    not by word, and only texts that recur hit. clean_batch() already cleans
+    each distinct text of a batch once, so a training run mostly fills the
+    cache with one-off tweets; it pays off on the serving path, where the
+    same texts come back across requests. It lives in memory only.
+    """
+
+    def __init__(self, language: str, max_size: int):
+        self.language = language
+        self.max_size = max_size
+        self.stemmer = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_stemmer(self):
+        if self.stemmer is None:
+            import nltk
+
+            self.stemmer = nltk.SnowballStemmer(self.language)
+        return self.stemmer
+
+    def stem(self, word: str) -> str:
+        with self._lock:
+            stemmed = self._entries.get(word)
+            if stemmed is not None:
+                self._entries.move_to_end(word)
+                self.hits += 1
+                return stemmed
+            self.misses += 1
+
+        stemmed = self.load_stemmer().stem(word)
+        with self._lock:
+            self._entries[word] = stemmed
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return stemmed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_stem_cache(language: str, max_size: int) -> StemCache:
+    """Returns the process-wide stem cache for a language and size."""
+    key = (language, max_size)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = StemCache(language, max_size)
+            _caches[key] = cache
+        return cache
@@ -0,0 +1,142 @@
+import os
+import re
+import string
+from hate_speech_detection.components.stem_cache import get_stem_cache
+from hate_speech_detection.constants import BUNDLED_STOPWORDS_DIR
+from hate_speech_detection.logger.logger import logger
+
+
+def load_stopwords(language: str, cache_dir: str = None) -> list:
+    """
+    Stop words of a language, read from cache_dir/<language>.txt or from
+    the copy bundled with the code when either exists. Otherwise they come
+    from the NLTK corpus, downloaded only if it is not installed, and are
+    written to the cache for the next process.
+    """
+    cache_path = os.path.join(cache_dir, f"{language}.txt") if cache_dir else None
+    for path in (cache_path, os.path.join(BUNDLED_STOPWORDS_DIR, f"{language}.txt")):
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read().split()
+
+    import nltk
+    from nltk.corpus import stopwords
+
+    try:
+        words = stopwords.words(language)
+    except LookupError:
+        logger.info("Downloading NLTK stopwords corpus...")
+        nltk.download("stopwords", quiet=True)
+        words = stopwords.words(language)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(words))
+        os.replace(tmp_path, cache_path)
+    return words
+
+
+class TextCleaner:
+    """
+    Cleans tweets for the model: lowercasing, removal of markup, links,
+    punctuation and digit-bearing words, stop-word filtering and stemming.
+
+    The stemmer, stop-word set and compiled patterns are built once, so one
+    instance can be reused for every text of a dataset or of a server. With a
+    positive stem_cache_size, stemming goes through the process-wide
+    StemCache shared by every cleaner of the same language and cache size.
+    NLTK is heavy to import, so the stemmer and the stop words are only
+    loaded by load() or the first clean().
+    """
+
+    # Applied in this order, like the original step-by-step cleaning;
+    # overlapping matches (e.g. a link inside brackets) depend on it.
+    MARKUP_PATTERNS = (
+        re.compile(r"\[.*?\]"),
+        re.compile(r"https?://\S+|www\.\S+"),
+        re.compile(r"<.*?>+"),
+    )
+    DIGIT_WORD_PATTERN = re.compile(r"\w*\d\w*")
+    # Punctuation and newlines are plain character deletions, one table does both
+    DELETE_TABLE = str.maketrans("", "", string.punctuation + "\n")
+
+    def __init__(
+        self,
+        language: str,
+        more_stopwords: list = None,
+        stem_cache_size: int = 0,
+        stopwords_dir: str = None,
+    ):
+        self.language = language
+        self.stem_cache = None
+        self._stemmer = None
+        if stem_cache_size > 0:
+            self.stem_cache = get_stem_cache(language, stem_cache_size)
+            self._stemmer = self.stem_cache
+        self.more_stopwords = frozenset(more_stopwords or [])
+        self.stopwords_dir = stopwords_dir
+        self._stop_words = None
+
+    def load_stemmer(self):
+        if self._stemmer is None:
+            import nltk
+
+            self._stemmer = nltk.SnowballStemmer(self.language)
+        return self._stemmer
+
+    def load_stop_words(self) -> frozenset:
+        if self._stop_words is None:
+            words = load_stopwords(self.language, self.stopwords_dir)
+            self._stop_words = frozenset(words) | self.more_stopwords
+        return self._stop_words
+
+    @property
+    def stemmer(self):
+        return self.load_stemmer()
+
+    @property
+    def stop_words(self) -> frozenset:
+        return self.load_stop_words()
+
+    def load(self):
+        """Loads the stop words and stemmer now instead of on the first clean()."""
+        self.load_stop_words()
+        if self.stem_cache is not None:
+            self.stem_cache.load_stemmer()
+        else:
+            self.load_stemmer()
+
+    def clean(self, text) -> str:
+        text = str(text).lower()
+        for pattern in self.MARKUP_PATTERNS:
+            text = pattern.sub("", text)
+        text = text.translate(self.DELETE_TABLE)
+        text = self.DIGIT_WORD_PATTERN.sub("", text)
+
+        stop_words = self.load_stop_words()
+        words = [word for word in text.split(" ") if word not in stop_words]
+        text = " ".join(words)
+        # The original cleaning stems the whole filtered text once per word
+        # and the trained vocabulary depends on that, so it is kept as is.
+        stemmed = self.load_stemmer().stem(text)
+        return " ".join([stemmed] * len(text.split(" ")))
+
+    def clean_batch(self, texts):
+        """
+        Cleans a pandas Series (index is preserved) or an iterable of texts
+        (a list is returned). Repeated texts are cleaned only once.
+        """
+        cleaned = {}
+
+        def clean_once(text):
+            key = str(text)
+            result = cleaned.get(key)
+            if result is None:
+                result = cleaned[key] = self.clean(key)
+            return result
+
+        if hasattr(texts, "map") and hasattr(texts, "index"):
+            return texts.map(clean_once)
+        return [clean_once(text) for text in texts]
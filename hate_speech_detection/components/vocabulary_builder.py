@@ -0,0 +1,233 @@
+import os
+import json
+import math
+import zlib
+import base64
+import hashlib
+import itertools
+from collections import Counter
+import numpy as np
+from hate_speech_detection.logger.logger import logger
+from hate_speech_detection.ml.vectorizer import ngrams, split_tokens
+
+
+class BloomFilter:
+    """
+    Set membership of texts in a fixed number of bits, sized for capacity
+    texts at the given false positive rate (about 10 bits per text at 1%).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.size = max(64, math.ceil(bits))
+        self.hashes = max(1, round(self.size / max(1, capacity) * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, text: str) -> list:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        # Double hashing: position i is h1 + i * h2
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, text: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(text)
+        )
+
+    def add(self, text: str):
+        for position in self._positions(text):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def merge(self, other: "BloomFilter"):
+        self.bits |= other.bits
+
+    def empty_copy(self) -> "BloomFilter":
+        bloom = BloomFilter.__new__(BloomFilter)
+        bloom.size = self.size
+        bloom.hashes = self.hashes
+        bloom.bits = np.zeros_like(self.bits)
+        return bloom
+
+    def to_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "hashes": self.hashes,
+            "bits": base64.b64encode(zlib.compress(self.bits.tobytes())).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BloomFilter":
+        bloom = cls.__new__(cls)
+        bloom.size = data["size"]
+        bloom.hashes = data["hashes"]
+        bits = zlib.decompress(base64.b64decode(data["bits"]))
+        bloom.bits = np.frombuffer(bits, dtype=np.uint8).copy()
+        return bloom
+
+
+class VocabularyBuilder:
+    """
+    Builds the TextVectorization vocabulary in one streaming pass.
+
+    Texts are split into n-grams of the given widths exactly like
+    TextVectorization(ngrams=widths) does, and the vocabulary is ordered the
+    same way as adapt(): by count, ties broken by the token itself.
+
+    With a positive counter_capacity the n-gram counts are a Misra-Gries
+    heavy-hitters summary: once the table grows past twice the capacity,
+    every count is decreased by the count of the (capacity + 1)-th most
+    frequent n-gram and the n-grams that drop to zero are forgotten. Memory
+    stays bounded and any n-gram seen more often than error_bound times is
+    kept. With capacity 0 the counts are exact.
+
+    Counts can be saved and loaded back. In incremental mode a Bloom filter
+    of the counted texts, sized for seen_capacity texts, is saved with them
+    so a later run only counts the texts it has not seen yet. Texts already
+    counted are skipped with all their repeats, and about 1% of the new
+    texts are skipped as false positives.
+    """
+
+    MASK_TOKEN = ""
+    OOV_TOKEN = "[UNK]"
+
+    def __init__(
+        self,
+        max_tokens: int,
+        ngrams: tuple = (1, 4),
+        counter_capacity: int = 0,
+        sample_fraction: float = 1.0,
+        random_state: int = None,
+        chunk_size: int = 10000,
+        incremental: bool = False,
+        seen_capacity: int = 1000000,
+    ):
+        if not 0.0 < sample_fraction <= 1.0:
+            raise ValueError(f"sample_fraction must be in (0, 1], got {sample_fraction}")
+        self.max_tokens = max_tokens
+        self.ngrams = tuple(ngrams)
+        self.counter_capacity = counter_capacity
+        self.sample_fraction = sample_fraction
+        self.chunk_size = chunk_size
+        self.counts = Counter()
+        self.seen = BloomFilter(seen_capacity) if incremental else None
+        self.error_bound = 0
+        self.texts_counted = 0
+        self._rng = np.random.default_rng(random_state)
+
+    def _ngrams(self, texts):
+        for text in texts:
+            yield from ngrams(split_tokens(text), self.ngrams)
+
+    def _new_texts(self, texts: list, counted: BloomFilter) -> list:
+        """Keeps only the texts not counted by an earlier run."""
+        if self.seen is None:
+            return texts
+        new_texts = [text for text in texts if text not in self.seen]
+        # Added after the whole update, repeats within this run all count
+        for text in new_texts:
+            counted.add(text)
+        return new_texts
+
+    def _sample(self, texts) -> list:
+        if self.sample_fraction >= 1.0:
+            return texts
+        keep = self._rng.random(len(texts)) < self.sample_fraction
+        return [text for text, kept in zip(texts, keep) if kept]
+
+    def _prune(self):
+        capacity = self.counter_capacity
+        if not capacity or len(self.counts) <= 2 * capacity:
+            return
+        values = np.fromiter(self.counts.values(), dtype=np.int64)
+        # Count of the (capacity + 1)-th most frequent n-gram
+        kth = len(values) - capacity - 1
+        threshold = int(np.partition(values, kth)[kth])
+        self.counts = Counter(
+            {
+                token: count - threshold
+                for token, count in self.counts.items()
+                if count > threshold
+            }
+        )
+        self.error_bound += threshold
+
+    def update(self, texts):
+        """Counts the n-grams of texts, chunk by chunk, as they are iterated."""
+        texts = iter(texts)
+        counted = self.seen.empty_copy() if self.seen is not None else None
+        total = new = 0
+        while True:
+            chunk = [str(text) for text in itertools.islice(texts, self.chunk_size)]
+            if not chunk:
+                break
+            total += len(chunk)
+            # Sampled out texts are not marked as seen, a later run may count them
+            chunk = self._new_texts(self._sample(chunk), counted)
+            new += len(chunk)
+            self.counts.update(self._ngrams(chunk))
+            self._prune()
+        if counted is not None:
+            self.seen.merge(counted)
+        self.texts_counted += new
+        logger.info(
+            f"Vocabulary counts updated - texts: {total}, counted: {new}, n-grams: {len(self.counts)}, error bound: {self.error_bound}"
+        )
+        return self
+
+    def vocabulary(self) -> list:
+        """Returns the learned tokens, without the mask and OOV tokens."""
+        counts = {
+            token: count
+            for token, count in self.counts.items()
+            if token not in (self.MASK_TOKEN, self.OOV_TOKEN)
+        }
+        # adapt() sorts by (count, token bytes) descending
+        tokens = sorted(
+            counts,
+            key=lambda token: (counts[token], token.encode("utf-8")),
+            reverse=True,
+        )
+        return tokens[: self.max_tokens - 2]
+
+    def save(self, path: str):
+        """Writes the counts, and the seen texts filter, to a JSON file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ngrams": self.ngrams,
+                    "error_bound": self.error_bound,
+                    "texts_counted": self.texts_counted,
+                    "counts": self.counts,
+                    "seen": self.seen.to_dict() if self.seen is not None else None,
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+        logger.info(f"Vocabulary counts with {len(self.counts)} n-grams saved: {path}")
+
+    def load(self, path: str):
+        """Continues from counts written by save()."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if tuple(data.get("ngrams", ())) != self.ngrams:
+            logger.warning(f"Ignoring vocabulary counts {path} built for other ngrams")
+            return self
+        if self.seen is None or "bits" not in (data.get("seen") or {}):
+            # Without the filter every text would be counted a second time
+            logger.warning(
+                f"Ignoring vocabulary counts {path} saved without a seen-texts "
+                "filter, counting from scratch"
+            )
+            return self
+        self.seen = BloomFilter.from_dict(data["seen"])
+        self.counts = Counter(data["counts"])
+        self.error_bound = data["error_bound"]
+        self.texts_counted = data["texts_counted"]
+        self._prune()
+        logger.info(
+            f"Vocabulary counts loaded - texts: {self.texts_counted}, n-grams: {len(self.counts)}: {path}"
+        )
+        return self
@@ -2,13 +2,18 @@ import os
 import yaml
 from dataclasses import dataclass
 from hate_speech_detection.constants import CONFIG_FILE_PATH, MAIN_ARTIFACTS_DIR
-from hate_speech_detection.utils.common_utils import read_yaml, create_directories
+from hate_speech_detection.utils.common_utils import (
+    read_yaml,
+    create_directories,
+    artifact_path,
+)
 from hate_speech_detection.entity.config_entity import (
     DataIngestionConfig,
     DataTransformationConfig,
     ModelTrainerConfig,
     ModelEvaluationConfig,
     PredictionConfig,
+    PipelineConfig,
     WebConfig,
 )
 from hate_speech_detection.exception.exception import (
@@ -25,6 +30,7 @@ class Configuration:
     model_trainer: dict
     model_evaluation: dict
     prediction: dict
+    pipeline: dict
     web: dict
 
 
@@ -62,6 +68,7 @@ class ConfigurationManager:
                 model_trainer=config_dict.get("model_trainer", {}),
                 model_evaluation=config_dict.get("model_evaluation", {}),
                 prediction=config_dict.get("prediction", {}),
+                pipeline=config_dict.get("pipeline", {}),
                 web=config_dict.get("web", {}),
             )
 
@@ -137,10 +144,17 @@ class ConfigurationManager:
             ),
         )
 
+    def _artifact_path(self, directory: str, file_name: str) -> str:
+        """Path of a data artifact, with the extension of the configured format"""
+        return artifact_path(
+            os.path.join(directory, file_name),
+            self.config.data_transformation["artifact_format"],
+        )
+
     def get_data_transformation_config(self):
         return DataTransformationConfig(
             artifacts_dir=self.data_transformation_dir,
-            transformed_file_path=os.path.join(
+            transformed_file_path=self._artifact_path(
                 self.data_transformation_dir,
                 self.config.data_transformation["transformed_file_name"],
             ),
@@ -150,6 +164,19 @@ class ConfigurationManager:
             tweet_column=self.config.data_transformation["tweet_column"],
             language=self.config.data_transformation["language"],
             more_stopwords=self.config.data_transformation["more_stopwords"],
+            stem_cache_size=self.config.data_transformation["stem_cache_size"],
+            stopwords_dir=os.path.join(
+                self.data_transformation_dir,
+                self.config.data_transformation["stopwords_dir"],
+            ),
+            num_workers=self.config.data_transformation["num_workers"],
+            chunk_size=self.config.data_transformation["chunk_size"],
+            streaming=self.config.data_transformation["streaming"],
+            read_chunk_size=self.config.data_transformation["read_chunk_size"],
+            artifact_format=self.config.data_transformation["artifact_format"],
+            artifact_compression=self.config.data_transformation[
+                "artifact_compression"
+            ],
         )
 
     def get_model_trainer_config(self):
@@ -158,24 +185,34 @@ class ConfigurationManager:
             tokenizer_path=os.path.join(
                 self.model_trainer_dir, self.config.model_trainer["tokenizer_name"]
             ),
+            tokenizer_config_path=os.path.join(
+                self.model_trainer_dir,
+                self.config.model_trainer["tokenizer_config_name"],
+            ),
+            vocab_path=os.path.join(
+                self.model_trainer_dir, self.config.model_trainer["vocab_name"]
+            ),
             trained_model_dir=self.trained_model_dir,
             trained_model_path=os.path.join(
                 self.model_trainer_dir,
                 self.config.model_trainer["model_dir"],
                 self.config.model_trainer["trained_model_name"],
             ),
-            x_train_path=os.path.join(
+            x_train_path=self._artifact_path(
                 self.model_trainer_dir, self.config.model_trainer["x_train_file"]
             ),
-            y_train_path=os.path.join(
+            y_train_path=self._artifact_path(
                 self.model_trainer_dir, self.config.model_trainer["y_train_file"]
             ),
-            x_test_path=os.path.join(
+            x_test_path=self._artifact_path(
                 self.model_trainer_dir, self.config.model_trainer["x_test_file"]
             ),
-            y_test_path=os.path.join(
+            y_test_path=self._artifact_path(
                 self.model_trainer_dir, self.config.model_trainer["y_test_file"]
             ),
+            split_path=os.path.join(
+                self.model_trainer_dir, self.config.model_trainer["split_file"]
+            ),
             random_state=self.config.model_trainer["random_state"],
             epochs=self.config.model_trainer["epochs"],
             batch_size=self.config.model_trainer["batch_size"],
@@ -185,6 +222,17 @@ class ConfigurationManager:
             loss=self.config.model_trainer["loss"],
             metrics=self.config.model_trainer["metrics"],
             activation=self.config.model_trainer["activation"],
+            use_tf_data=self.config.model_trainer["use_tf_data"],
+            shuffle_buffer=self.config.model_trainer["shuffle_buffer"],
+            dataset_cache=self.config.model_trainer["dataset_cache"],
+            vocab_mode=self.config.model_trainer["vocab_mode"],
+            vocab_counter_capacity=self.config.model_trainer["vocab_counter_capacity"],
+            vocab_sample_fraction=self.config.model_trainer["vocab_sample_fraction"],
+            vocab_incremental=self.config.model_trainer["vocab_incremental"],
+            vocab_seen_capacity=self.config.model_trainer["vocab_seen_capacity"],
+            vocab_counts_path=os.path.join(
+                self.model_trainer_dir, self.config.model_trainer["vocab_counts_name"]
+            ),
         )
 
     def get_model_evaluation_config(self):
@@ -195,6 +243,10 @@ class ConfigurationManager:
             best_model_path=os.path.join(
                 self.best_model_dir, self.config.model_trainer["trained_model_name"]
             ),
+            quantization_report_path=os.path.join(
+                self.model_evaluation_dir,
+                self.config.model_evaluation["quantization_report_name"],
+            ),
         )
 
     def get_prediction_config(self):
@@ -205,12 +257,81 @@ class ConfigurationManager:
             tokenizer_path=os.path.join(
                 self.prediction_dir, self.config.prediction["tokenizer_name"]
             ),
+            tokenizer_config_path=os.path.join(
+                self.prediction_dir, self.config.prediction["tokenizer_config_name"]
+            ),
+            vocab_path=os.path.join(
+                self.prediction_dir, self.config.prediction["vocab_name"]
+            ),
             model_path=os.path.join(
                 self.prediction_dir, self.config.prediction["model_name"]
             ),
+            numpy_model_path=os.path.join(
+                self.prediction_dir, self.config.prediction["numpy_model_dir"]
+            ),
+            engine=self.config.prediction["engine"],
+            numpy_tolerance=self.config.prediction["numpy_tolerance"],
+            numpy_converge_tol=self.config.prediction["numpy_converge_tol"],
+            numpy_bucket_size=self.config.prediction["numpy_bucket_size"],
+            quantized_model_path=os.path.join(
+                self.prediction_dir, self.config.prediction["quantized_model_dir"]
+            ),
+            quantize_keep_tokens=self.config.prediction["quantize_keep_tokens"],
+            quantized_max_accuracy_drop=self.config.prediction[
+                "quantized_max_accuracy_drop"
+            ],
+            reload_interval=self.config.prediction["reload_interval"],
+            warmup_batch_sizes=self.config.prediction["warmup_batch_sizes"],
+            result_cache_size=self.config.prediction["result_cache_size"],
+            result_cache_ttl=self.config.prediction["result_cache_ttl"],
+            result_cache_backend=self.config.prediction["result_cache_backend"],
+            result_cache_db_path=os.path.join(
+                self.prediction_dir, self.config.prediction["result_cache_db_name"]
+            ),
+            report_path=os.path.join(
+                self.prediction_dir, self.config.prediction["report_name"]
+            ),
+        )
+
+    def get_pipeline_config(self):
+        return PipelineConfig(
+            stage_cache_enabled=self.config.pipeline["stage_cache"],
+            stage_cache_path=os.path.join(
+                self.main_artifacts_dir, self.config.pipeline["stage_cache_file"]
+            ),
+            force_stages=self.config.pipeline["force_stages"],
+            run_report_path=os.path.join(
+                self.main_artifacts_dir, self.config.pipeline["run_report_file"]
+            ),
+            run_history_path=os.path.join(
+                self.main_artifacts_dir, self.config.pipeline["run_history_file"]
+            ),
+            profile=self.config.pipeline["profile"],
+            profile_stages=self.config.pipeline["profile_stages"],
+            profile_dir=os.path.join(
+                self.main_artifacts_dir, self.config.pipeline["profile_dir"]
+            ),
         )
 
     def get_web_config(self):
         return WebConfig(
-            app_host=self.config.web["app_host"], app_port=self.config.web["app_port"]
+            app_host=self.config.web["app_host"],
+            app_port=self.config.web["app_port"],
+            max_batch_size=self.config.web["max_batch_size"],
+            max_batch_wait_ms=self.config.web["max_batch_wait_ms"],
+            max_queue_size=self.config.web["max_queue_size"],
+            max_batch_texts=self.config.web["max_batch_texts"],
+            stream_chunk_size=self.config.web["stream_chunk_size"],
+            stream_spool_size=self.config.web["stream_spool_size"],
+            stream_max_bytes=self.config.web["stream_max_bytes"],
+            workers=self.config.web["workers"],
+            worker_restart_delay=self.config.web["worker_restart_delay"],
+            train_cpu_affinity=self.config.web["train_cpu_affinity"],
+            train_nice=self.config.web["train_nice"],
+            train_threads=self.config.web["train_threads"],
+            train_progress_interval=self.config.web["train_progress_interval"],
+            train_jobs_kept=self.config.web["train_jobs_kept"],
+            train_jobs_dir=os.path.join(
+                self.main_artifacts_dir, self.config.web["train_jobs_dir"]
+            ),
         )
@@ -1,4 +1,5 @@
 import subprocess
+import hashlib
 import os
 import sys
 from hate_speech_detection.exception.exception import GCloudSyncError
@@ -70,3 +71,31 @@ class GCloudSync:
 
         except Exception as e:
             raise GCloudSyncError(e) from e
+
+    def fingerprint_gcloud_folder(self, gcp_bucket_url):
+        """
+        Hashes the listing of a Google Cloud Storage folder: object names,
+        sizes, update times and generation numbers.
+
+        Args:
+            gcp_bucket_url (str): The URL of the GCP bucket (e.g., gs://your-bucket-name).
+
+        Returns:
+            str: Hex digest that changes whenever an object is added or rewritten.
+        """
+        try:
+            command = [
+                "gcloud",
+                "storage",
+                "ls",
+                "--all-versions",
+                "--long",
+                "--recursive",
+                f"gs://{gcp_bucket_url}",
+            ]
+            result = subprocess.run(command, check=True, capture_output=True, text=True)
+            lines = sorted(line.strip() for line in result.stdout.splitlines())
+            return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+        except Exception as e:
+            raise GCloudSyncError(e) from e
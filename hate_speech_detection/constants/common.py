@@ -8,3 +8,7 @@ CONFIG_FILE_PATH = os.path.join(
 )
 MAIN_ARTIFACTS_DIR = os.path.join(ROOT_DIR, "artifacts")
 # MAIN_ARTIFACTS_DIR = os.path.join(ROOT_DIR, "artifacts", TIMESTAMP)
+# Stop words shipped with the code, so no NLTK download is needed
+BUNDLED_STOPWORDS_DIR = os.path.join(
+    ROOT_DIR, "hate_speech_detection", "configuration", "stopwords"
+)
@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StageSpec:
+    """Inputs, config parameters and outputs that define a pipeline stage run"""
+
+    name: str
+    inputs: list = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+    outputs: list = field(default_factory=list)
+    cacheable: bool = True
@@ -23,18 +23,29 @@ class DataTransformationConfig:
     tweet_column: str
     language: str
     more_stopwords: list
+    stem_cache_size: int
+    stopwords_dir: str
+    num_workers: int
+    chunk_size: int
+    streaming: bool
+    read_chunk_size: int
+    artifact_format: str
+    artifact_compression: str
 
 
 @dataclass
 class ModelTrainerConfig:
     artifacts_dir: str
     tokenizer_path: str
+    tokenizer_config_path: str
+    vocab_path: str
     trained_model_dir: str
     trained_model_path: str
     x_train_path: str
     y_train_path: str
     x_test_path: str
     y_test_path: str
+    split_path: str
     random_state: int
     epochs: int
     batch_size: int
@@ -44,6 +55,15 @@ class ModelTrainerConfig:
     loss: str
     metrics: list
     activation: str
+    use_tf_data: bool
+    shuffle_buffer: int
+    dataset_cache: str
+    vocab_mode: str
+    vocab_counter_capacity: int
+    vocab_sample_fraction: float
+    vocab_incremental: bool
+    vocab_seen_capacity: int
+    vocab_counts_path: str
 
 
 @dataclass
@@ -52,6 +72,7 @@ class ModelEvaluationConfig:
     bucket_best_dir: str
     best_model_dir: str
     best_model_path: str
+    quantization_report_path: str
 
 
 @dataclass
@@ -59,11 +80,55 @@ class PredictionConfig:
     artifacts_dir: str
     tokenizer_name: str
     tokenizer_path: str
+    tokenizer_config_path: str
+    vocab_path: str
     model_name: str
     model_path: str
+    numpy_model_path: str
+    engine: str
+    numpy_tolerance: float
+    numpy_converge_tol: float
+    numpy_bucket_size: int
+    quantized_model_path: str
+    quantize_keep_tokens: int
+    quantized_max_accuracy_drop: float
+    reload_interval: int
+    warmup_batch_sizes: list
+    result_cache_size: int
+    result_cache_ttl: float
+    result_cache_backend: str
+    result_cache_db_path: str
+    report_path: str
+
+
+@dataclass
+class PipelineConfig:
+    stage_cache_enabled: bool
+    stage_cache_path: str
+    force_stages: list
+    run_report_path: str
+    run_history_path: str
+    profile: str
+    profile_stages: list
+    profile_dir: str
 
 
 @dataclass
 class WebConfig:
     app_host: str
     app_port: int
+    max_batch_size: int
+    max_batch_wait_ms: float
+    max_queue_size: int
+    max_batch_texts: int
+    stream_chunk_size: int
+    stream_spool_size: int
+    stream_max_bytes: int
+    workers: int
+    worker_restart_delay: float
+    train_cpu_affinity: list
+    train_nice: int
+    train_threads: int
+    train_progress_interval: float
+    train_jobs_kept: int
+    train_jobs_dir: str
@@ -77,5 +77,13 @@ class ModelEvaluationError(CustomException):
     """Error while evaluating the model"""
 
 
+class ModelLoadingError(CustomException):
+    """Error loading prediction artifacts"""
+
+
+class TrainingJobError(CustomException):
+    """Error in a background training job"""
+
+
 class PipelineExecutionError(CustomException):
     """General error in the pipeline run"""
@@ -2,21 +2,24 @@ import datetime
 import logging
 import os
 
-from matplotlib.dates import DAILY
 
+def setup_logging() -> str:
+    """
+    Sends the records of the root logger (used by the exception and
+    gcloud_syncer modules) to an hourly file under logs/<day>. Called by the
+    entry points, importing the package has no side effects. Returns the
+    path of the log file.
+    """
+    now = datetime.datetime.now()
+    logs_path = os.path.join(os.getcwd(), "logs", now.strftime("%Y-%m-%d"))
+    os.makedirs(logs_path, exist_ok=True)
+    log_file_path = os.path.join(logs_path, f"{now.strftime('%Y-%m-%d_%H')}-00-00.log")
 
-LOG_FILE = f"{datetime.datetime.now().strftime('%Y-%m-%d_%H')}-00-00.log"
-DAILY_LOGS_DIR = f"{datetime.datetime.now().strftime('%Y-%m-%d')}"
-logs_path = os.path.join(os.getcwd(), "logs", DAILY_LOGS_DIR)
-
-os.makedirs(logs_path, exist_ok=True)
-LOG_FILE_PATH = os.path.join(logs_path, LOG_FILE)
-
-print(f"Log file path: {LOG_FILE_PATH}")
-
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[%(asctime)s]: %(levelname)s: %(message)s",
-    level=logging.DEBUG,  # DEBUG, INFO, WARNING, ERROR, CRITICAL
-    filemode="a",
-)
+    # A no-op when the root logger is already configured
+    logging.basicConfig(
+        filename=log_file_path,
+        format="[%(asctime)s]: %(levelname)s: %(message)s",
+        level=logging.DEBUG,  # DEBUG, INFO, WARNING, ERROR, CRITICAL
+        filemode="a",
+    )
+    return log_file_path
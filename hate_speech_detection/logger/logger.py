@@ -1,14 +1,32 @@
 import os
+import time
+import queue
+import atexit
+import random
 import shutil
 import datetime
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import yaml
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from hate_speech_detection.constants import CONFIG_FILE_PATH
 
+# Used when the config file has no logging section
+DEFAULT_LOG_SETTINGS = {
+    "async": True,
+    "queue_size": 10000,
+    "level": "INFO",
+    "module_levels": {},
+    "request_level": "INFO",
+    "request_sample_rate": 1.0,
+    "request_rate_limit": 100,
+}
 
-def clean_old_logs(base_log_dir: str, days_to_keep: int = 7):
+
+def clean_old_logs(base_log_dir: str = None, days_to_keep: int = 7):
     """
     Deletes log directories older than the specified number of days.
     """
+    base_log_dir = base_log_dir or os.path.join(os.getcwd(), "logs")
 
     if not os.path.exists(base_log_dir):
         return
@@ -27,13 +45,143 @@ def clean_old_logs(base_log_dir: str, days_to_keep: int = 7):
                 continue
 
 
-def get_logger(name: str = "hate_speech_detection") -> logging.Logger:
+def load_log_settings(config_file_path: str = CONFIG_FILE_PATH) -> dict:
+    """
+    The logging section of the config file. Read here rather than through
+    ConfigurationManager, which itself logs, so the logger exists first.
+    """
+    settings = dict(DEFAULT_LOG_SETTINGS)
+    if os.path.exists(config_file_path):
+        with open(config_file_path, "r") as file:
+            settings.update((yaml.safe_load(file) or {}).get("logging") or {})
+    return settings
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Minimum level per source module (file name without .py)."""
+
+    def __init__(self, level: int, module_levels: dict):
+        super().__init__()
+        self.level = level
+        self.module_levels = module_levels
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.module_levels.get(record.module, self.level)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a random share of the records below WARNING."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or random.random() < self.rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket of per_second records with bursts of up to one second's
+    worth; records at WARNING and above always pass. Not locked: concurrent
+    threads may let a few extra records through, which is harmless here.
+    """
+
+    def __init__(self, per_second: float):
+        super().__init__()
+        self.per_second = per_second
+        self.tokens = per_second
+        self.updated = time.monotonic()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        self.tokens = min(
+            self.per_second, self.tokens + (now - self.updated) * self.per_second
+        )
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.dropped += 1
+        return False
+
+
+class _BlockingQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # Waits for room: a full queue must not make stop() fail
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogHandler(QueueHandler):
+    """
+    Hands records to a background thread that writes them with the given
+    handlers, so the logging thread never waits on disk or console I/O.
+
+    The queue is bounded and records are dropped (and counted) when it is
+    full instead of blocking. The writer thread is restarted in processes
+    forked by serve.py.
+    """
+
+    def __init__(self, handlers: list, queue_size: int):
+        super().__init__(queue.Queue(queue_size))
+        self.handlers = handlers
+        self.dropped = 0
+        self.running = False
+        self._start()
+        os.register_at_fork(after_in_child=self._restart)
+        atexit.register(self.stop)
+
+    def _start(self):
+        self.listener = _BlockingQueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+        self.running = True
+
+    def _restart(self):
+        # The parent's writer thread does not exist in the child
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.dropped = 0
+        self._start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatted by the writer thread, not by the caller
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Writes the queued records and stops the writer thread."""
+        if self.running:
+            self.running = False
+            self.listener.stop()
+
+
+def get_logger(
+    name: str = "hate_speech_detection", settings: dict = None
+) -> logging.Logger:
     """
     Creates a logger with hourly rotation and daily log directories.
+    Old directories are removed by clean_old_logs(), which the entry points
+    call once, outside of the import path.
+
+    With settings["async"] the records are written by a background thread.
+    module_levels raise or lower the level of single modules.
     """
+    settings = settings or load_log_settings()
 
     base_log_dir = os.path.join(os.getcwd(), "logs")
-    clean_old_logs(base_log_dir, days_to_keep=7)
     current_day_dir = os.path.join(
         base_log_dir, datetime.datetime.now().strftime("%Y-%m-%d")
     )
@@ -63,14 +211,65 @@ def get_logger(name: str = "hate_speech_detection") -> logging.Logger:
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
 
+    level = logging.getLevelName(settings["level"])
+    module_levels = {
+        module: logging.getLevelName(module_level)
+        for module, module_level in settings["module_levels"].items()
+    }
+    handlers = [file_handler, console_handler]
+    if settings["async"]:
+        handlers = [AsyncLogHandler(handlers, settings["queue_size"])]
+
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # The logger lets through the lowest level any module needs, the
+    # handler filter applies the level of each module
+    logger.setLevel(min([level, *module_levels.values()]))
+    for handler in handlers:
+        handler.addFilter(ModuleLevelFilter(level, module_levels))
+        logger.addHandler(handler)
     logger.propagate = False
 
     return logger
 
 
-logger = get_logger()
-logger.info("Logger running. Older logs are cleared automatically.")
+def get_request_logger(parent: logging.Logger, settings: dict = None):
+    """
+    Child logger for the per-request records of the serving path, sampled
+    and rate limited so that load does not turn into log I/O.
+    """
+    settings = settings or load_log_settings()
+    request_logger = parent.getChild("requests")
+    request_logger.setLevel(logging.getLevelName(settings["request_level"]))
+    if settings["request_sample_rate"] < 1.0:
+        request_logger.addFilter(SamplingFilter(settings["request_sample_rate"]))
+    if settings["request_rate_limit"] > 0:
+        request_logger.addFilter(RateLimitFilter(settings["request_rate_limit"]))
+    return request_logger
+
+
+def flush_logs():
+    """Writes the queued records; call before leaving with os._exit()."""
+    for handler in logger.handlers:
+        if isinstance(handler, AsyncLogHandler):
+            handler.stop()
+
+
+def log_stats() -> dict:
+    """Records dropped by the queue, the sampling and the rate limit."""
+    stats = {}
+    for handler in logger.handlers:
+        if isinstance(handler, AsyncLogHandler):
+            stats["queue_dropped"] = handler.dropped
+            stats["queue_depth"] = handler.queue.qsize()
+    for log_filter in request_logger.filters:
+        if isinstance(log_filter, SamplingFilter):
+            stats["request_sampled_out"] = log_filter.dropped
+        elif isinstance(log_filter, RateLimitFilter):
+            stats["request_rate_limited"] = log_filter.dropped
+    return stats
+
+
+_log_settings = load_log_settings()
+logger = get_logger(settings=_log_settings)
+request_logger = get_request_logger(logger, _log_settings)
+logger.info("Logger running.")
@@ -0,0 +1,252 @@
+import os
+import time
+import pickle
+import hashlib
+import threading
+from dataclasses import dataclass
+from hate_speech_detection.entity.config_entity import PredictionConfig
+from hate_speech_detection.exception.exception import ModelLoadingError
+from hate_speech_detection.logger.logger import logger
+from hate_speech_detection.ml.numpy_lstm import MANIFEST_NAME, NumpyLSTMModel
+from hate_speech_detection.ml.vectorizer import TextVectorizer
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    model: object
+    tokenizer: object
+    version: str
+    engine: str
+    loaded_at: float
+    load_seconds: float
+    warmup_seconds: float
+
+
+class ModelRegistry:
+    """
+    Keeps the prediction model and tokenizer resident in memory.
+
+    Readers only dereference the current bundle, so they never take a lock.
+    A background watcher polls the artifact files and, once a change has been
+    stable for one polling interval, loads a new bundle and swaps it in.
+    Every bundle is warmed up with dummy batches before it is swapped in.
+    """
+
+    def __init__(self, prediction_config: PredictionConfig):
+        self.config = prediction_config
+        self._bundle = None
+        # not_loaded, loading, warming_up, ready or failed
+        self.state = "not_loaded"
+        self.last_error = None
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+
+    def _export_dir(self):
+        """Directory of the NumPy export to serve, None to serve with Keras."""
+        export_dir = {
+            "numpy": self.config.numpy_model_path,
+            "quantized": self.config.quantized_model_path,
+        }.get(self.config.engine)
+        if export_dir and os.path.exists(os.path.join(export_dir, MANIFEST_NAME)):
+            return export_dir
+        return None
+
+    @property
+    def engine(self) -> str:
+        """Engine the next load uses: keras when the configured export is missing."""
+        return self.config.engine if self._export_dir() else "keras"
+
+    def _artifact_paths(self) -> list:
+        export_dir = self._export_dir()
+        if export_dir:
+            # Rewritten last, when the whole export is in place
+            paths = [os.path.join(export_dir, MANIFEST_NAME)]
+        else:
+            paths = [self.config.model_path]
+        if os.path.exists(self.config.tokenizer_config_path):
+            return paths + [self.config.tokenizer_config_path, self.config.vocab_path]
+        return paths + [self.config.tokenizer_path]
+
+    def _load_model(self):
+        export_dir = self._export_dir()
+        if export_dir:
+            return NumpyLSTMModel.load(
+                export_dir,
+                converge_tol=self.config.numpy_converge_tol,
+                bucket_size=self.config.numpy_bucket_size,
+            )
+        if self.config.engine != "keras":
+            logger.warning(f"No {self.config.engine} export found, serving with Keras")
+        import keras
+
+        return keras.models.load_model(self.config.model_path)
+
+    def _load_tokenizer(self):
+        if os.path.exists(self.config.tokenizer_config_path):
+            return TextVectorizer.load(self.config.tokenizer_config_path)
+        # Artifacts from before tokenizer.json only have the pickled layer
+        logger.warning(f"Falling back to pickled tokenizer: {self.config.tokenizer_path}")
+        with open(self.config.tokenizer_path, "rb") as f:
+            return pickle.load(f)
+
+    def fingerprint(self) -> str:
+        """Version identifier built from the artifacts' size and mtime."""
+        parts = []
+        for path in self._artifact_paths():
+            stat = os.stat(path)
+            parts.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+    def _set_state(self, state: str):
+        # A reload keeps serving the resident bundle, so the state only
+        # follows the first load
+        if self._bundle is None:
+            self.state = state
+
+    def _warm_up(self, model, tokenizer) -> float:
+        """
+        Runs one dummy batch of every configured size, so graph tracing and
+        the first touch of the weight pages do not hit real requests.
+        """
+        start = time.perf_counter()
+        for batch_size in self.config.warmup_batch_sizes:
+            text_vec = tokenizer(["warm up"] * batch_size)
+            model.predict(text_vec, batch_size=batch_size, verbose=0)
+        return time.perf_counter() - start
+
+    def _load_bundle(self, version: str) -> ModelBundle:
+        logger.info(f"Loading prediction artifacts (version {version})...")
+        self._set_state("loading")
+        engine = self.engine
+        start = time.perf_counter()
+        model = self._load_model()
+        tokenizer = self._load_tokenizer()
+        load_seconds = time.perf_counter() - start
+        self._set_state("warming_up")
+        warmup_seconds = self._warm_up(model, tokenizer)
+        logger.info(
+            f"Prediction artifacts (version {version}, {engine}) loaded in {load_seconds:.2f}s, warmed up in {warmup_seconds:.2f}s"
+        )
+        return ModelBundle(
+            model=model,
+            tokenizer=tokenizer,
+            version=version,
+            engine=engine,
+            loaded_at=time.time(),
+            load_seconds=load_seconds,
+            warmup_seconds=warmup_seconds,
+        )
+
+    def load(self) -> ModelBundle:
+        """Load the artifacts unless the resident bundle is already current."""
+        try:
+            with self._load_lock:
+                version = self.fingerprint()
+                bundle = self._bundle
+                if bundle is None or bundle.version != version:
+                    bundle = self._load_bundle(version)
+                    self._bundle = bundle
+                    self.state = "ready"
+                    self.last_error = None
+                return bundle
+        except Exception as e:
+            self._set_state("failed")
+            self.last_error = str(e)
+            raise ModelLoadingError(e) from e
+
+    def get(self) -> ModelBundle:
+        bundle = self._bundle
+        if bundle is None:
+            bundle = self.load()
+        return bundle
+
+    @property
+    def version(self):
+        """Version of the resident bundle, None before the first load."""
+        bundle = self._bundle
+        return bundle.version if bundle is not None else None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._bundle is not None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+
+    def status(self) -> dict:
+        """State of the resident bundle, for health and readiness checks."""
+        status = {"state": self.state}
+        bundle = self._bundle
+        if bundle is not None:
+            status.update(
+                version=bundle.version,
+                engine=bundle.engine,
+                loaded_at=bundle.loaded_at,
+                load_seconds=round(bundle.load_seconds, 3),
+                warmup_seconds=round(bundle.warmup_seconds, 3),
+                warmup_batch_sizes=self.config.warmup_batch_sizes,
+            )
+        if self.last_error:
+            status["last_error"] = self.last_error
+        return status
+
+    def _watch(self, interval: float):
+        pending = None
+        while not self._stop_event.wait(interval):
+            try:
+                version = self.fingerprint()
+            except FileNotFoundError:
+                pending = None
+                continue
+
+            bundle = self._bundle
+            if bundle is not None and bundle.version == version:
+                pending = None
+                continue
+
+            # Wait for the files to stop changing before reloading, so a
+            # model that is still being copied is never picked up.
+            if version != pending:
+                pending = version
+                continue
+
+            try:
+                self.load()
+            except ModelLoadingError as e:
+                logger.error(f"Background model reload failed: {e}")
+            pending = None
+
+    def start_watcher(self):
+        interval = self.config.reload_interval
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="model-registry", daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Watching prediction artifacts every {interval}s")
+
+    def stop_watcher(self):
+        if self._watcher is None:
+            return
+        self._stop_event.set()
+        self._watcher.join()
+        self._watcher = None
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_model_registry(prediction_config: PredictionConfig) -> ModelRegistry:
+    """Returns the process-wide registry for the given prediction artifacts."""
+    key = (prediction_config.model_path, prediction_config.tokenizer_path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = ModelRegistry(prediction_config)
+            _registries[key] = registry
+        return registry
@@ -0,0 +1,247 @@
+import os
+import json
+import shutil
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+# Weight matrices stored as int8 by quantize_export, with one scale per row
+# of the embeddings and per output column of the kernels
+QUANTIZED_AXES = {
+    "embeddings": 1,
+    "lstm_kernel": 0,
+    "lstm_recurrent_kernel": 0,
+    "dense_kernel": 0,
+}
+# Layers that are identities at inference time
+INFERENCE_NO_OPS = ("InputLayer", "Dropout", "SpatialDropout1D")
+
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    # tanh form does not overflow for large negative inputs
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+ACTIVATIONS = {"sigmoid": sigmoid, "tanh": np.tanh, "linear": lambda x: x}
+
+
+def export_weights(model, directory: str):
+    """
+    Dumps the weights of a ModelArchitecture network (Embedding, LSTM and
+    Dense) as .npy files plus a manifest.json, replacing the directory.
+    """
+    arrays, manifest = {}, {"layers": []}
+    for layer in model.layers:
+        kind = type(layer).__name__
+        config = layer.get_config()
+        if kind in INFERENCE_NO_OPS:
+            continue
+        if kind == "Embedding":
+            if config.get("mask_zero"):
+                raise ValueError("Embedding with mask_zero is not supported")
+            arrays["embeddings"] = layer.get_weights()[0]
+        elif kind == "LSTM":
+            if config["return_sequences"] or config["go_backwards"]:
+                raise ValueError("Only a forward LSTM returning its last state works")
+            weights = layer.get_weights()
+            arrays["lstm_kernel"], arrays["lstm_recurrent_kernel"] = weights[:2]
+            arrays["lstm_bias"] = (
+                weights[2] if config["use_bias"] else np.zeros(weights[0].shape[1])
+            )
+            manifest["lstm_activation"] = config["activation"]
+            manifest["lstm_recurrent_activation"] = config["recurrent_activation"]
+        elif kind == "Dense":
+            weights = layer.get_weights()
+            arrays["dense_kernel"] = weights[0]
+            arrays["dense_bias"] = (
+                weights[1] if config["use_bias"] else np.zeros(weights[0].shape[1])
+            )
+            manifest["dense_activation"] = config["activation"]
+        else:
+            raise ValueError(f"Layer {layer.name} ({kind}) is not supported")
+        manifest["layers"].append(kind)
+
+    if manifest["layers"] != ["Embedding", "LSTM", "Dense"]:
+        raise ValueError(f"Unsupported layer stack: {manifest['layers']}")
+    arrays = {name: np.asarray(array, np.float32) for name, array in arrays.items()}
+    _write_export(arrays, manifest, directory)
+
+
+def _write_export(arrays: dict, manifest: dict, directory: str):
+    manifest = dict(manifest)
+    manifest["arrays"] = {
+        name: {"shape": list(array.shape), "dtype": str(array.dtype)}
+        for name, array in arrays.items()
+    }
+    # Build next to the target and swap it in, readers never see half an export
+    tmp_dir = f"{directory.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def _quantize_int8(array: np.ndarray, axis: int):
+    """Symmetric int8 quantization with one scale per slice along axis."""
+    scale = np.max(np.abs(array), axis=axis, keepdims=True) / 127.0
+    scale[scale == 0] = 1.0
+    quantized = np.clip(np.round(array / scale), -127, 127).astype(np.int8)
+    return quantized, np.squeeze(scale, axis=axis).astype(np.float32)
+
+
+def quantize_export(source_dir: str, directory: str, num_tokens: int = None):
+    """
+    Writes an int8 copy of the float32 export in source_dir. With num_tokens
+    only the first num_tokens embedding rows are kept; the vocabulary is
+    sorted by frequency, so these are the most frequent tokens and every
+    other id is served as the OOV token.
+    """
+    with open(os.path.join(source_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("quantization"):
+        raise ValueError(f"{source_dir} is already quantized")
+    arrays = {
+        name: np.load(os.path.join(source_dir, f"{name}.npy"))
+        for name in manifest["arrays"]
+    }
+    if num_tokens:
+        arrays["embeddings"] = arrays["embeddings"][:num_tokens]
+    for name, axis in QUANTIZED_AXES.items():
+        arrays[name], arrays[f"{name}_scale"] = _quantize_int8(arrays[name], axis)
+    manifest["quantization"] = "int8"
+    _write_export(arrays, manifest, directory)
+
+
+class NumpyLSTMModel:
+    """
+    NumPy forward pass of the ModelArchitecture network: embedding lookup,
+    LSTM recurrence (Keras gate order i, f, c, o) and the dense head.
+
+    Weights are memory-mapped by default, so processes loading the same
+    export share the pages. predict() mirrors keras Model.predict for the
+    arguments the prediction pipeline uses.
+
+    The network has no masking, so the trailing padding ids still update the
+    LSTM state. Inputs are bucketed by real length, and the padding steps use
+    one precomputed input projection. They stop once the state no longer
+    changes by more than converge_tol; this matches Keras within that
+    tolerance.
+    """
+
+    def __init__(
+        self,
+        arrays: dict,
+        manifest: dict,
+        converge_tol: float = 1e-6,
+        bucket_size: int = 64,
+    ):
+        # The embeddings stay int8 and only the gathered rows are rescaled;
+        # the small kernels are dequantized once
+        self.embeddings = arrays["embeddings"]
+        self.embedding_scale = arrays.get("embeddings_scale")
+        self.kernel = self._dequantize(arrays, "lstm_kernel")
+        self.recurrent_kernel = self._dequantize(arrays, "lstm_recurrent_kernel")
+        self.bias = arrays["lstm_bias"]
+        self.dense_kernel = self._dequantize(arrays, "dense_kernel")
+        self.dense_bias = arrays["dense_bias"]
+        self.units = self.recurrent_kernel.shape[0]
+        self.activation = ACTIVATIONS[manifest["lstm_activation"]]
+        self.recurrent_activation = ACTIVATIONS[
+            manifest["lstm_recurrent_activation"]
+        ]
+        self.dense_activation = ACTIVATIONS[manifest["dense_activation"]]
+        self.converge_tol = converge_tol
+        self.bucket_size = bucket_size
+        # Input projection of the padding id, the same for every padding step
+        padding_vector = self._embed(np.zeros(1, np.int64))[0]
+        self.padding_projection = padding_vector @ self.kernel + self.bias
+
+    @staticmethod
+    def _dequantize(arrays: dict, name: str) -> np.ndarray:
+        scale = arrays.get(f"{name}_scale")
+        if scale is None:
+            return arrays[name]
+        return arrays[name].astype(np.float32) * scale
+
+    def _embed(self, token_ids: np.ndarray) -> np.ndarray:
+        num_tokens = len(self.embeddings)
+        # Ids of pruned embedding rows are out-of-vocabulary
+        token_ids = np.where(token_ids < num_tokens, token_ids, 1)
+        vectors = np.take(self.embeddings, token_ids, axis=0)
+        if self.embedding_scale is not None:
+            vectors = vectors.astype(np.float32)
+            vectors *= self.embedding_scale[token_ids][..., np.newaxis]
+        return vectors
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True, **options) -> "NumpyLSTMModel":
+        with open(os.path.join(directory, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        arrays = {}
+        for name, spec in manifest["arrays"].items():
+            path = os.path.join(directory, f"{name}.npy")
+            array = np.load(path, mmap_mode="r" if mmap else None)
+            if list(array.shape) != spec["shape"]:
+                raise ValueError(
+                    f"{path} has shape {array.shape}, expected {spec['shape']}"
+                )
+            arrays[name] = array
+        return cls(arrays, manifest, **options)
+
+    @staticmethod
+    def sequence_lengths(token_ids: np.ndarray) -> np.ndarray:
+        """Position after the last non-padding id of every row."""
+        nonzero = token_ids != 0
+        last = token_ids.shape[1] - np.argmax(nonzero[:, ::-1], axis=1)
+        return np.where(nonzero.any(axis=1), last, 0)
+
+    def _step(self, z, c):
+        units = self.units
+        i = self.recurrent_activation(z[:, :units])
+        f = self.recurrent_activation(z[:, units : 2 * units])
+        g = self.activation(z[:, 2 * units : 3 * units])
+        o = self.recurrent_activation(z[:, 3 * units :])
+        c = f * c + i * g
+        return o * self.activation(c), c
+
+    def _forward(self, token_ids: np.ndarray, length: int) -> np.ndarray:
+        batch, steps = token_ids.shape
+        # Input projections of the real steps in one matmul
+        inputs = self._embed(token_ids[:, :length])
+        projected = inputs @ self.kernel + self.bias
+
+        h = np.zeros((batch, self.units), dtype=np.float32)
+        c = np.zeros((batch, self.units), dtype=np.float32)
+        for t in range(length):
+            h, c = self._step(projected[:, t] + h @ self.recurrent_kernel, c)
+
+        for _ in range(steps - length):
+            h_next, c_next = self._step(
+                self.padding_projection + h @ self.recurrent_kernel, c
+            )
+            converged = (
+                np.max(np.abs(h_next - h)) <= self.converge_tol
+                and np.max(np.abs(c_next - c)) <= self.converge_tol
+            )
+            h, c = h_next, c_next
+            if converged:
+                break
+        return self.dense_activation(h @ self.dense_kernel + self.dense_bias)
+
+    def predict(self, x, batch_size: int = None, verbose=0) -> np.ndarray:
+        token_ids = np.asarray(x)
+        if token_ids.ndim == 1:
+            token_ids = token_ids[np.newaxis, :]
+        outputs = np.zeros((len(token_ids), self.dense_kernel.shape[1]), np.float32)
+
+        # Rows of similar length share a bucket, so little padding is computed
+        lengths = self.sequence_lengths(token_ids)
+        order = np.argsort(lengths, kind="stable")
+        bucket_size = min(batch_size or self.bucket_size, self.bucket_size)
+        for start in range(0, len(order), bucket_size):
+            rows = order[start : start + bucket_size]
+            outputs[rows] = self._forward(token_ids[rows], int(lengths[rows].max()))
+        return outputs
@@ -0,0 +1,80 @@
+import time
+import keras
+
+
+class ProgressCallback(keras.callbacks.Callback):
+    """
+    Reports training progress as event dicts: the start and end of every
+    epoch and, at most every interval seconds, the current batch with its
+    metrics. Each event carries an ETA for the whole fit(), from the mean
+    time per batch so far; with a tf.data input of unknown length the ETA
+    starts once the first epoch has shown the number of steps.
+    """
+
+    def __init__(self, report, interval: float = 1.0):
+        super().__init__()
+        self.report = report
+        self.interval = interval
+        self._started = None
+        self._last_report = 0.0
+        self._batches_done = 0
+        self._epoch = 0
+        self._steps = None
+
+    @staticmethod
+    def _metrics(logs) -> dict:
+        return {name: round(float(value), 4) for name, value in (logs or {}).items()}
+
+    def _eta(self):
+        epochs = self.params.get("epochs")
+        if not self._steps or not epochs or not self._batches_done:
+            return None
+        per_batch = (time.monotonic() - self._started) / self._batches_done
+        remaining = max(0, self._steps * epochs - self._batches_done)
+        return round(per_batch * remaining, 1)
+
+    def on_train_begin(self, logs=None):
+        self._started = time.monotonic()
+        self._batches_done = 0
+        self._steps = self.params.get("steps")
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch = epoch + 1
+        self.report(
+            {
+                "event": "epoch_started",
+                "epoch": self._epoch,
+                "epochs": self.params.get("epochs"),
+            }
+        )
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._batches_done += 1
+        now = time.monotonic()
+        if now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        self.report(
+            {
+                "event": "batch",
+                "epoch": self._epoch,
+                "epochs": self.params.get("epochs"),
+                "batch": batch + 1,
+                "steps": self._steps,
+                "metrics": self._metrics(logs),
+                "eta_seconds": self._eta(),
+            }
+        )
+
+    def on_epoch_end(self, epoch, logs=None):
+        if not self._steps:
+            self._steps = self._batches_done
+        self.report(
+            {
+                "event": "epoch_finished",
+                "epoch": epoch + 1,
+                "epochs": self.params.get("epochs"),
+                "metrics": self._metrics(logs),
+                "eta_seconds": self._eta(),
+            }
+        )
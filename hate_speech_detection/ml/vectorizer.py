@@ -0,0 +1,104 @@
+import os
+import re
+import json
+import string
+import numpy as np
+
+# Same character class as TextVectorization's punctuation stripping
+PUNCTUATION_PATTERN = re.compile(r'[!"#$%&()\*\+,-\./:;<=>?@\[\\\]^_`{|}~\']')
+# tf.strings.lower and tf.strings.split only know about ASCII
+LOWER_TABLE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\v\f\r]+")
+
+
+def split_tokens(text: str) -> list:
+    """Lowercases, strips punctuation and splits like TextVectorization."""
+    text = text.translate(LOWER_TABLE)
+    text = PUNCTUATION_PATTERN.sub("", text)
+    return [token for token in WHITESPACE_PATTERN.split(text) if token]
+
+
+def ngrams(tokens: list, widths: tuple) -> list:
+    """N-grams of every width, grouped by width like tf.strings.ngrams."""
+    grams = []
+    for width in widths:
+        if width == 1:
+            grams.extend(tokens)
+        else:
+            grams.extend(
+                " ".join(tokens[i : i + width]) for i in range(len(tokens) - width + 1)
+            )
+    return grams
+
+
+class TextVectorizer:
+    """
+    NumPy replacement for an adapted TextVectorization(output_mode="int").
+
+    Produces the same integer sequences from the vocabulary and a few config
+    values, so serving and evaluation can tokenize without TensorFlow. The
+    artifact is a JSON config plus the vocabulary as a flat text file, one
+    token per line with the line number as its index.
+    """
+
+    def __init__(self, vocabulary: list, ngrams: tuple, sequence_length: int):
+        self.vocabulary = vocabulary
+        self.ngrams = tuple(ngrams)
+        self.sequence_length = sequence_length
+        self.oov_index = 1
+        self._index = {token: i for i, token in enumerate(vocabulary)}
+        # The mask token is never looked up
+        self._index.pop("", None)
+
+    @classmethod
+    def from_layer(cls, layer) -> "TextVectorizer":
+        config = layer.get_config()
+        widths = config["ngrams"]
+        if isinstance(widths, int):
+            widths = tuple(range(1, widths + 1))
+        return cls(
+            vocabulary=list(layer.get_vocabulary()),
+            ngrams=widths or (1,),
+            sequence_length=config["output_sequence_length"],
+        )
+
+    def vectorize_one(self, text: str) -> list:
+        grams = ngrams(split_tokens(text), self.ngrams)[: self.sequence_length]
+        return [self._index.get(gram, self.oov_index) for gram in grams]
+
+    def __call__(self, texts) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        vectors = np.zeros((len(texts), self.sequence_length), dtype=np.int64)
+        for row, text in enumerate(texts):
+            ids = self.vectorize_one(str(text))
+            vectors[row, : len(ids)] = ids
+        return vectors
+
+    def save(self, config_path: str, vocab_path: str):
+        with open(vocab_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write("\n".join(self.vocabulary))
+        config = {
+            "vocab_file": os.path.basename(vocab_path),
+            "vocab_size": len(self.vocabulary),
+            "ngrams": list(self.ngrams),
+            "sequence_length": self.sequence_length,
+        }
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+    @classmethod
+    def load(cls, config_path: str) -> "TextVectorizer":
+        """Loads a vectorizer saved by save(); the vocab file sits next to it."""
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        vocab_path = os.path.join(os.path.dirname(config_path), config["vocab_file"])
+        # Tokens may hold characters that splitlines() treats as line breaks
+        with open(vocab_path, "r", encoding="utf-8", newline="") as f:
+            vocabulary = f.read().split("\n")
+        if len(vocabulary) != config["vocab_size"]:
+            raise ValueError(
+                f"Vocabulary {vocab_path} has {len(vocabulary)} tokens, expected {config['vocab_size']}"
+            )
+        return cls(vocabulary, config["ngrams"], config["sequence_length"])
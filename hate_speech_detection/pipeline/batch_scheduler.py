@@ -0,0 +1,146 @@
+import time
+import asyncio
+from collections import Counter
+from hate_speech_detection.logger.logger import logger
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into a single model call.
+
+    A batch is closed when it reaches max_batch_size or when max_wait_ms has
+    passed since its first request arrived. Batches run one at a time in the
+    default executor; requests arriving meanwhile form the next batch.
+
+    An optional observer is called after every batch with its size, the
+    queue wait of each request, the time the batch waited for an executor
+    thread and the time predict_fn ran.
+    """
+
+    def __init__(
+        self, predict_fn, max_batch_size, max_wait_ms, max_queue_size, observer=None
+    ):
+        self.predict_fn = predict_fn
+        self.observer = observer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+        self._queue = None
+        self._task = None
+        self._batch_sizes = Counter()
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Micro-batching enabled (max_batch_size={self.max_batch_size}, "
+            f"max_wait={self.max_wait * 1000:g}ms)"
+        )
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Nothing will score what is still queued
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("MicroBatcher was stopped"))
+
+    async def submit(self, text):
+        """Queues one text and waits for its prediction."""
+        if self._task is None:
+            raise RuntimeError("MicroBatcher is not running, call start() first")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            # Requests whose client went away are not worth scoring
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            texts = [text for text, _, _ in batch]
+            self._batches += 1
+            self._items += len(texts)
+            self._batch_sizes[len(texts)] += 1
+
+            submitted = time.perf_counter()
+            timings = []
+            try:
+                results = await loop.run_in_executor(
+                    None, self._timed_predict, texts, timings
+                )
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._observe(batch, submitted, timings)
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _timed_predict(self, texts, timings: list):
+        timings.append(time.perf_counter())
+        try:
+            return self.predict_fn(texts)
+        finally:
+            timings.append(time.perf_counter())
+
+    def _observe(self, batch, submitted: float, timings: list):
+        if self.observer is None or len(timings) != 2:
+            return
+        started, finished = timings
+        queue_waits = [submitted - enqueued for _, _, enqueued in batch]
+        try:
+            self.observer(
+                len(batch), queue_waits, started - submitted, finished - started
+            )
+        except Exception:
+            logger.exception("Batch observer failed")
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self._max_queue_depth,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+        }
@@ -1,9 +1,11 @@
-import keras
-import pickle
+import os
 from hate_speech_detection.configuration.config_manager import ConfigurationManager
 from hate_speech_detection.exception.exception import PipelineExecutionError
-from hate_speech_detection.logger.logger import logger
-from hate_speech_detection.components.data_transforamation import DataTransformation
+from hate_speech_detection.logger.logger import logger, request_logger
+from hate_speech_detection.components.text_cleaner import TextCleaner
+from hate_speech_detection.ml.model_registry import get_model_registry
+from hate_speech_detection.pipeline.result_cache import ResultCache, SqliteResultStore
+from hate_speech_detection.utils.instrumentation import Instrumentation
 
 
 class PredictionPipeline:
@@ -12,35 +14,113 @@ class PredictionPipeline:
         self.config_manager = configuration_manager or ConfigurationManager()
         self.pred_config = self.config_manager.get_prediction_config()
         self.trans_config = self.config_manager.get_data_transformation_config()
-        self.ingest_config = self.config_manager.get_data_ingestion_config()
-        self.data_transform = DataTransformation(self.trans_config, self.ingest_config)
+        # Only the cleaner is needed here, DataTransformation pulls in pandas
+        self.cleaner = TextCleaner(
+            self.trans_config.language,
+            self.trans_config.more_stopwords,
+            self.trans_config.stem_cache_size,
+            self.trans_config.stopwords_dir,
+        )
+        self.registry = get_model_registry(self.pred_config)
+        self.result_cache = self._make_result_cache()
+        # Steps run concurrently in the server threads: CPU is per thread and
+        # every thread records into its own shard, without a shared lock
+        self.instrumentation = Instrumentation(
+            "prediction", per_thread_cpu=True, sharded=True
+        )
+
+    def _make_result_cache(self):
+        if self.pred_config.result_cache_size <= 0:
+            return None
+        store = None
+        if self.pred_config.result_cache_backend == "sqlite":
+            store = SqliteResultStore(
+                self.pred_config.result_cache_db_path,
+                self.pred_config.result_cache_size,
+            )
+        return ResultCache(
+            self.pred_config.result_cache_size,
+            ttl=self.pred_config.result_cache_ttl,
+            store=store,
+            current_version=lambda: self.registry.version,
+        )
+
+    def _score(self, bundle, texts):
+        """Scores cleaned texts, reusing cached results of the same model."""
+        cached = {}
+        if self.result_cache is not None:
+            cached = self.result_cache.get_many(bundle.version, texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        self.instrumentation.count("texts", len(texts))
+        self.instrumentation.count("scored_texts", len(missing))
+        if missing:
+            with self.instrumentation.stage("vectorize"):
+                text_vec = bundle.tokenizer(missing)
+            with self.instrumentation.stage("model"):
+                preds = bundle.model.predict(
+                    text_vec, batch_size=len(missing), verbose=0
+                )
+            scored = {
+                text: "hate" if pred[0] > 0.5 else "no hate"
+                for text, pred in zip(missing, preds)
+            }
+            if self.result_cache is not None:
+                self.result_cache.put_many(bundle.version, scored)
+            cached.update(scored)
+        return [cached[text] for text in texts]
 
     def _predict(self, text):
-        load_model = keras.models.load_model(self.pred_config.model_path)
-        with open(self.pred_config.tokenizer_path, "rb") as f:
-            load_tokenizer = pickle.load(f)
+        bundle = self.registry.get()
 
-        text = self.data_transform.data_cleaning(text)
+        with self.instrumentation.stage("clean"):
+            text = self.cleaner.clean(text)
         text = [text]
-        logger.info(f"TEXT::: {text}")
-
-        text_vec = load_tokenizer(text)
-        pred = load_model.predict(text_vec)
+        # Per-request records are sampled and formatted lazily, off the caller
+        request_logger.debug("TEXT::: %s", text)
 
-        if pred > 0.5:
-            logger.info("hate and abusive")
+        if self._score(bundle, text)[0] == "hate":
+            request_logger.info("hate and abusive")
             return "hate"
         else:
-            logger.info("no hate")
+            request_logger.info("no hate")
             return "no hate"
 
+    def _predict_batch(self, texts):
+        bundle = self.registry.get()
+
+        with self.instrumentation.stage("clean"):
+            texts = self.cleaner.clean_batch(texts)
+        return self._score(bundle, list(texts))
+
+    def save_report(self):
+        """
+        Saves the step timings of this process next to the artifacts, as
+        <report_name>.<pid>.json: every serve.py worker writes its own.
+        """
+        root, extension = os.path.splitext(self.pred_config.report_path)
+        try:
+            self.instrumentation.save(f"{root}.{os.getpid()}{extension}")
+        except OSError as e:
+            logger.warning(f"Prediction report not saved: {e}")
+
     def run_pipeline(self, text):
         try:
-            logger.info("Starting prediction pipeline...")
+            request_logger.debug("Starting prediction pipeline...")
             result = self._predict(text)
-            logger.info("Prediction pipeline completed successfully.")
+            request_logger.debug("Prediction pipeline completed successfully.")
             return result
 
         except Exception as e:
             logger.error(f"Unexpected error in pipeline: {e}")
             raise PipelineExecutionError(e) from e
+
+    def run_batch(self, texts):
+        try:
+            request_logger.info("Batch prediction of %d texts...", len(texts))
+            results = self._predict_batch(texts)
+            request_logger.debug("Batch prediction completed successfully.")
+            return results
+
+        except Exception as e:
+            logger.error(f"Unexpected error in batch prediction: {e}")
+            raise PipelineExecutionError(e) from e
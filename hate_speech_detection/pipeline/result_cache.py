@@ -0,0 +1,225 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from hate_speech_detection.logger.logger import logger
+
+
+class SqliteResultStore:
+    """
+    On-disk second tier of the ResultCache, so results survive restarts.
+    Keeps at most max_size rows, evicting the least recently written ones.
+
+    The connection is opened on first use in each process, so a store
+    created before forking serving workers is never shared between them.
+    Its own lock serializes the threads of a process.
+    """
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self._writes = 0
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, version TEXT, result TEXT, expires_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_expiry ON results (expires_at)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def get_many(self, keys: list) -> dict:
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                rows = self._conn.execute(
+                    "SELECT key, result, expires_at FROM results "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for key, result, expires_at in rows:
+                    found[key] = (result, expires_at)
+        return found
+
+    def put_many(self, version: str, entries: list):
+        rows = [(key, version, result, expiry) for key, result, expiry in entries]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows
+            )
+            self._writes += len(entries)
+            if self._writes >= max(1, self.max_size // 10):
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        self._writes = 0
+        self._conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM results WHERE rowid NOT IN "
+            "(SELECT rowid FROM results ORDER BY rowid DESC LIMIT ?)",
+            (self.max_size,),
+        )
+
+    def drop_other_versions(self, version: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE version != ?", (version,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of prediction results with an optional time to live.
+
+    Keys hash the model version together with the cleaned text, and entries
+    of other versions are dropped as soon as a new version is seen, so a
+    reloaded model never serves stale results. With current_version, a
+    callable returning the version being served, the cache only moves
+    forward to that version: a request still finishing on the previous
+    model neither reads nor writes it. Safe to share between threads; the
+    lock only covers the in-memory entries, never the store.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float = 0,
+        store: SqliteResultStore = None,
+        current_version=None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = store
+        self.current_version = current_version
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(version: str, text: str) -> str:
+        payload = f"{version}\0{text}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def _is_stale(self, version: str) -> bool:
+        """Whether version is of a model already swapped out."""
+        if version == self._version or self.current_version is None:
+            return False
+        return version != self.current_version()
+
+    def _switch_version(self, version: str) -> bool:
+        """Clears the entries of other versions, called under the lock."""
+        if version == self._version:
+            return False
+        if self._version is not None:
+            logger.info(f"Model version changed to {version}, clearing result cache")
+        self._entries.clear()
+        self._version = version
+        return True
+
+    def _drop_other_versions(self, version: str):
+        if self.store is not None:
+            self.store.drop_other_versions(version)
+
+    def get_many(self, version: str, texts: list) -> dict:
+        """Returns the cached results of texts, as a dict keyed by text."""
+        now = time.time()
+        keys = {text: self.key(version, text) for text in set(texts)}
+        found, missing = {}, []
+        with self._lock:
+            stale = self._is_stale(version)
+            switched = not stale and self._switch_version(version)
+            for text, key in keys.items():
+                entry = None if stale else self._entries.get(key)
+                if entry is not None and (entry[1] is None or entry[1] > now):
+                    self._entries.move_to_end(key)
+                    found[text] = entry[0]
+                elif not stale:
+                    missing.append(text)
+        if switched:
+            self._drop_other_versions(version)
+
+        from_store = {}
+        if missing and self.store is not None:
+            stored = self.store.get_many([keys[text] for text in missing])
+            for text in missing:
+                entry = stored.get(keys[text])
+                if entry is not None and (entry[1] is None or entry[1] > now):
+                    from_store[text] = entry
+
+        with self._lock:
+            if from_store and version == self._version:
+                for text, (result, expires_at) in from_store.items():
+                    self._remember(keys[text], result, expires_at)
+            found.update((text, entry[0]) for text, entry in from_store.items())
+            self.store_hits += len(from_store)
+            hits = sum(1 for text in texts if text in found)
+            self.hits += hits
+            self.misses += len(texts) - hits
+        return found
+
+    def _remember(self, key: str, result: str, expires_at):
+        self._entries[key] = (result, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def put_many(self, version: str, results: dict):
+        """Caches a dict of results keyed by text."""
+        expires_at = time.time() + self.ttl if self.ttl > 0 else None
+        entries = [
+            (self.key(version, text), result, expires_at)
+            for text, result in results.items()
+        ]
+        with self._lock:
+            if self._is_stale(version):
+                return
+            switched = self._switch_version(version)
+            for key, result, _ in entries:
+                self._remember(key, result, expires_at)
+        if switched:
+            self._drop_other_versions(version)
+        if self.store is not None:
+            self.store.put_many(version, entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+        if self.store is not None:
+            stats["store_hits"] = self.store_hits
+        return stats
@@ -0,0 +1,172 @@
+import time
+from hate_speech_detection.utils.metrics import MetricsRegistry
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class ServingMetrics:
+    """
+    Metrics of the web service: requests, end-to-end and per-phase latency,
+    batching, executor waits, the resident model and the caches.
+
+    Request and phase timings go to lock-free histograms; everything kept by
+    other components (queue depth, model status, cache stats) is read at
+    scrape time. Metrics are per process, every serve.py worker has its own.
+    """
+
+    def __init__(self, predict_pipeline, batcher):
+        self.predict_pipeline = predict_pipeline
+        self.batcher = batcher
+        self.registry = MetricsRegistry(prefix="hate_speech_")
+        self.requests = self.registry.counter(
+            "http_requests_total",
+            "HTTP requests by route, method and status code.",
+            ("route", "method", "status"),
+        )
+        self.request_seconds = self.registry.histogram(
+            "http_request_duration_seconds",
+            "Time until the response starts, by route and method.",
+            ("route", "method"),
+        )
+        self.phase_seconds = self.registry.histogram(
+            "prediction_phase_seconds",
+            "Time of each prediction step (clean, vectorize, model) per batch.",
+            ("phase",),
+        )
+        self.queue_wait_seconds = self.registry.histogram(
+            "batch_queue_wait_seconds",
+            "Time a /predict request waited in the micro-batching queue.",
+        )
+        self.executor_wait_seconds = self.registry.histogram(
+            "executor_wait_seconds",
+            "Time scoring work waited for a free executor thread.",
+            ("source",),
+        )
+        self.batch_run_seconds = self.registry.histogram(
+            "batch_run_seconds",
+            "Time a scoring batch ran in the executor.",
+            ("source",),
+        )
+        self.batch_size = self.registry.histogram(
+            "batch_size",
+            "Texts per scoring batch.",
+            ("source",),
+            buckets=BATCH_SIZE_BUCKETS,
+        )
+        self.registry.gauge(
+            "batch_queue_depth",
+            "Requests waiting in the micro-batching queue.",
+            lambda: self.batcher.stats()["queue_depth"],
+        )
+        self.registry.gauge(
+            "model_info",
+            "Resident model version and engine.",
+            self._model_info,
+            ("version", "engine"),
+        )
+        self.registry.gauge(
+            "model_ready",
+            "1 once the model is loaded and warmed up.",
+            lambda: int(self.predict_pipeline.registry.is_ready),
+        )
+        self.registry.gauge(
+            "model_load_seconds",
+            "Load time of the resident model.",
+            lambda: self._model_status().get("load_seconds"),
+        )
+        self.registry.gauge(
+            "model_warmup_seconds",
+            "Warm-up time of the resident model.",
+            lambda: self._model_status().get("warmup_seconds"),
+        )
+        self.registry.gauge(
+            "cache_lookups_total",
+            "Cache lookups by cache and result.",
+            self._cache_lookups,
+            ("cache", "result"),
+            kind="counter",
+        )
+        self.registry.gauge(
+            "cache_hit_ratio",
+            "Share of cache lookups that were hits.",
+            self._cache_hit_ratios,
+            ("cache",),
+        )
+        self.registry.gauge(
+            "cache_entries",
+            "Entries held in memory by each cache.",
+            self._cache_sizes,
+            ("cache",),
+        )
+
+        predict_pipeline.instrumentation.listeners.append(self._observe_phase)
+        batcher.observer = self.observe_batch
+
+    def _model_status(self) -> dict:
+        return self.predict_pipeline.registry.status()
+
+    def _model_info(self):
+        status = self._model_status()
+        if "version" not in status:
+            return None
+        return {(status["version"], status["engine"]): 1}
+
+    def _cache_stats(self) -> dict:
+        caches = {}
+        stem_cache = self.predict_pipeline.cleaner.stem_cache
+        if stem_cache is not None:
+            caches["stem"] = stem_cache.stats()
+        if self.predict_pipeline.result_cache is not None:
+            caches["result"] = self.predict_pipeline.result_cache.stats()
+        return caches
+
+    def _cache_lookups(self):
+        values = {}
+        for cache, stats in self._cache_stats().items():
+            values[(cache, "hit")] = stats["hits"]
+            values[(cache, "miss")] = stats["misses"]
+        return values
+
+    def _cache_hit_ratios(self):
+        return {
+            (cache,): stats["hit_rate"] for cache, stats in self._cache_stats().items()
+        }
+
+    def _cache_sizes(self):
+        return {(cache,): stats["size"] for cache, stats in self._cache_stats().items()}
+
+    def _observe_phase(self, stage: str, wall: float, cpu: float):
+        self.phase_seconds.observe(wall, (stage,))
+
+    def observe_batch(self, size, queue_waits, executor_wait, run_seconds):
+        """MicroBatcher observer."""
+        self.batch_size.observe(size, ("micro_batch",))
+        self.executor_wait_seconds.observe(executor_wait, ("micro_batch",))
+        self.batch_run_seconds.observe(run_seconds, ("micro_batch",))
+        for wait in queue_waits:
+            self.queue_wait_seconds.observe(wait)
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        self.requests.inc(1, (route, method, str(status)))
+        self.request_seconds.observe(seconds, (route, method))
+
+    def timed_batch(self, source: str, fn, texts):
+        """
+        Wraps a scoring call for run_in_executor, recording how long it
+        waited for a thread, how long it ran and its batch size.
+        """
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            self.executor_wait_seconds.observe(started - submitted, (source,))
+            self.batch_size.observe(len(texts), (source,))
+            try:
+                return fn(texts)
+            finally:
+                self.batch_run_seconds.observe(time.perf_counter() - started, (source,))
+
+        return call
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import hashlib
+from hate_speech_detection.entity.artifact_entity import StageSpec
+from hate_speech_detection.logger.logger import logger
+from hate_speech_detection.utils.common_utils import file_hash
+
+
+class StageCache:
+    """
+    Content-addressed record of completed pipeline stages.
+
+    A stage's fingerprint hashes its name, config parameters and the content
+    of its input files. A stage is fresh, and can be skipped, when its
+    fingerprint matches the last successful run and its outputs still have
+    the content that run produced. Stages whose spec is not cacheable always
+    run.
+    """
+
+    def __init__(self, manifest_path: str, enabled: bool = True, force_stages=()):
+        self.manifest_path = manifest_path
+        self.enabled = enabled
+        self.force_stages = set(force_stages or [])
+        self._file_hashes = {}
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable stage cache manifest: {e}")
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _hash(self, path: str):
+        """Content hash of a file, memoized per size and mtime; None if missing."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        digest = self._file_hashes.get(key)
+        if digest is None:
+            digest = self._file_hashes[key] = file_hash(path)
+        return digest
+
+    def fingerprint(self, spec: StageSpec):
+        if not spec.cacheable:
+            return None
+        inputs = {path: self._hash(path) for path in spec.inputs}
+        if None in inputs.values():
+            return None
+        payload = {
+            "name": spec.name,
+            "params": spec.params,
+            "inputs": inputs,
+            "outputs": spec.outputs,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def is_fresh(self, spec: StageSpec, fingerprint: str) -> bool:
+        if not self.enabled or fingerprint is None or spec.name in self.force_stages:
+            return False
+        entry = self.manifest.get(spec.name)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+        return all(
+            self._hash(path) == digest for path, digest in entry["outputs"].items()
+        )
+
+    def record(self, spec: StageSpec, fingerprint: str):
+        if not self.enabled or fingerprint is None:
+            return
+        self.manifest[spec.name] = {
+            "fingerprint": fingerprint,
+            "outputs": {
+                path: self._hash(path)
+                for path in spec.outputs
+                if os.path.exists(path)
+            },
+            "completed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self._save_manifest()
+
+    def run(self, spec: StageSpec, stage_fn) -> bool:
+        """
+        Runs stage_fn unless the stage is fresh, then records the run.
+        Returns False when the stage was skipped.
+        """
+        fingerprint = self.fingerprint(spec)
+        if self.is_fresh(spec, fingerprint):
+            logger.info(f"Stage '{spec.name}' is unchanged, reusing its artifacts")
+            return False
+        stage_fn()
+        self.record(spec, fingerprint)
+        return True
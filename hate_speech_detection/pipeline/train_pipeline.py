@@ -1,38 +1,77 @@
+import time
 from hate_speech_detection.configuration.config_manager import ConfigurationManager
 from hate_speech_detection.exception.exception import PipelineExecutionError
-from hate_speech_detection.logger.logger import logger
+from hate_speech_detection.logger import setup_logging
+from hate_speech_detection.logger.logger import clean_old_logs, logger
+from hate_speech_detection.pipeline.stage_cache import StageCache
+from hate_speech_detection.utils.instrumentation import Instrumentation
 
 from hate_speech_detection.components.data_transforamation import DataTransformation
 from hate_speech_detection.components.model_evaluation import ModelEvaluation
 from hate_speech_detection.components.data_ingestion import DataIngestion
 from hate_speech_detection.components.data_validator import DataValidator
 from hate_speech_detection.components.model_trainer import ModelTrainer
+from hate_speech_detection.ml.progress_callback import ProgressCallback
 
 
 class TrainPipeline:
-    def __init__(self, configuration_manager=None):
+    def __init__(self, configuration_manager=None, progress=None):
+        # progress receives event dicts (stage transitions, epochs, batches)
+        self.progress = progress
         self.config_manager = configuration_manager or ConfigurationManager()
         self.ingest_config = self.config_manager.get_data_ingestion_config()
         self.trans_config = self.config_manager.get_data_transformation_config()
         self.train_config = self.config_manager.get_model_trainer_config()
         self.eval_config = self.config_manager.get_model_evaluation_config()
         self.pred_config = self.config_manager.get_prediction_config()
+        self.pipeline_config = self.config_manager.get_pipeline_config()
+        self.web_config = self.config_manager.get_web_config()
+        self.stage_cache = StageCache(
+            self.pipeline_config.stage_cache_path,
+            enabled=self.pipeline_config.stage_cache_enabled,
+            force_stages=self.pipeline_config.force_stages,
+        )
+        self.instrumentation = None
+
+    def _report(self, event: dict):
+        if self.progress is not None:
+            self.progress(event)
+
+    def _run_stage(self, spec, stage_fn):
+        self._report({"event": "stage_started", "stage": spec.name})
+        started = time.perf_counter()
+        with self.instrumentation.stage(spec.name) as stage:
+            stage["cached"] = not self.stage_cache.run(spec, stage_fn)
+        self._report(
+            {
+                "event": "stage_finished",
+                "stage": spec.name,
+                "cached": stage["cached"],
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        )
 
     def _run_data_ingestion(self):
         try:
             # Data Ingestion
             data_in = DataIngestion(self.ingest_config)
-            data_in.initiate_data_ingestion()
+            self._run_stage(data_in.stage_spec(), data_in.initiate_data_ingestion)
 
-            # Data validation
-            validator = DataValidator(file_path=self.ingest_config.imbalanced_data_path)
-            validator.validate()
-            validator = DataValidator(file_path=self.ingest_config.raw_data_path)
-            validator.validate()
+            # Data validation (in streaming mode each chunk is validated
+            # while it is transformed)
+            if not self.trans_config.streaming:
+                validator = DataValidator(
+                    file_path=self.ingest_config.imbalanced_data_path
+                )
+                self._run_stage(validator.stage_spec(), validator.validate)
+                validator = DataValidator(file_path=self.ingest_config.raw_data_path)
+                self._run_stage(validator.stage_spec(), validator.validate)
 
             # Data cleaning and transformation
             transformator = DataTransformation(self.trans_config, self.ingest_config)
-            transformator.initiate_data_transformation()
+            self._run_stage(
+                transformator.stage_spec(), transformator.initiate_data_transformation
+            )
 
         except Exception as e:
             logger.error(f"Unexpected pipeline error: {e}")
@@ -40,8 +79,15 @@ class TrainPipeline:
 
     def _train_model(self):
         try:
-            trainer = ModelTrainer(self.train_config, self.trans_config)
-            trainer.initiate_model_trainer()
+            callbacks = []
+            if self.progress is not None:
+                callbacks.append(
+                    ProgressCallback(
+                        self.progress, self.web_config.train_progress_interval
+                    )
+                )
+            trainer = ModelTrainer(self.train_config, self.trans_config, callbacks)
+            self._run_stage(trainer.stage_spec(), trainer.initiate_model_trainer)
         except Exception as e:
             logger.error(f"Unexpected training error: {e}")
             raise PipelineExecutionError(e) from e
@@ -51,14 +97,31 @@ class TrainPipeline:
             eval = ModelEvaluation(
                 self.eval_config, self.train_config, self.trans_config, self.pred_config
             )
-            eval.initiate_model_evaluation()
+            self._run_stage(eval.stage_spec(), eval.initiate_model_evaluation)
         except Exception as e:
             logger.error(f"Unexpected evaluating error: {e}")
             raise PipelineExecutionError(e) from e
 
+    def _save_run_report(self):
+        try:
+            self.instrumentation.save(
+                self.pipeline_config.run_report_path,
+                self.pipeline_config.run_history_path,
+            )
+        except OSError as e:
+            logger.warning(f"Run report not saved: {e}")
+
     def run_pipeline(self):
+        self.instrumentation = Instrumentation(
+            "training",
+            profile=self.pipeline_config.profile,
+            profile_stages=self.pipeline_config.profile_stages,
+            profile_dir=self.pipeline_config.profile_dir,
+        )
         try:
             logger.info("Starting evaluating pipeline...")
+            setup_logging()
+            clean_old_logs()
             self._run_data_ingestion()
             self._train_model()
             self._evaluate_model()
@@ -67,3 +130,5 @@ class TrainPipeline:
         except Exception as e:
             logger.error(f"Unexpected error in pipeline: {e}")
             raise PipelineExecutionError(e) from e
+        finally:
+            self._save_run_report()
@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import fcntl
+import uuid
+import queue
+import threading
+import multiprocessing
+from dataclasses import dataclass, field
+
+from hate_speech_detection.entity.config_entity import WebConfig
+from hate_speech_detection.exception.exception import TrainingJobError
+from hate_speech_detection.logger.logger import logger
+
+# Jobs are spawned, not forked: the serving process has running threads
+# (batcher, registry watcher, log writer) that a fork would copy mid-state
+SPAWN = multiprocessing.get_context("spawn")
+
+
+def _limit_resources(cpu_affinity: list, nice: int, threads: int):
+    """Keeps the training process off the CPUs the serving workers need."""
+    if cpu_affinity and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpu_affinity)
+    if nice:
+        os.nice(nice)
+    if threads:
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        import tensorflow as tf
+
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+
+def _run_training_job(events, parent_pid, cpu_affinity, nice, threads):
+    """Entry point of the training process, reports through the events queue."""
+    from hate_speech_detection.logger.logger import flush_logs
+
+    def report(event: dict):
+        # The lock of the job goes with the serving worker, stop with it
+        if os.getppid() != parent_pid:
+            raise TrainingJobError("The serving worker of this job exited")
+        events.put(event)
+
+    try:
+        _limit_resources(cpu_affinity, nice, threads)
+        from hate_speech_detection.pipeline.train_pipeline import TrainPipeline
+
+        TrainPipeline(progress=report).run_pipeline()
+        events.put({"event": "succeeded"})
+    except Exception as e:
+        events.put({"event": "failed", "error": str(e)})
+    finally:
+        flush_logs()
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    state: str = "running"  # running, succeeded or failed
+    started_at: float = field(default_factory=time.time)
+    finished_at: float = None
+    pid: int = None
+    owner_pid: int = field(default_factory=os.getpid)
+    error: str = None
+    # The stage_finished events; every event goes to the events file
+    stages: list = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("succeeded", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "pid": self.pid,
+            "owner_pid": self.owner_pid,
+            "error": self.error,
+            "stages": list(self.stages),
+        }
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class TrainingJobManager:
+    """
+    Runs TrainPipeline in a separate process, one job at a time across all
+    serve.py workers.
+
+    The process gets its own CPU budget (affinity, nice level and thread
+    count from the web config), so a retrain does not compete with the
+    prediction threads. Job state is shared through train_jobs_dir: the
+    worker that starts a job holds an fcntl lock on train.lock, holding the
+    job ID, until the job ends. Its watcher thread keeps the job state in
+    <job_id>.json, rewritten only when a stage ends or the job does, and
+    appends every progress event to <job_id>.events.jsonl, which readers
+    follow from the byte offset they reached.
+    """
+
+    LOCK_FILE = "train.lock"
+    # Events returned with the job status; the tail read is bounded too
+    RECENT_EVENTS = 20
+    RECENT_EVENTS_BYTES = 64 * 1024
+
+    def __init__(self, web_config: WebConfig):
+        self.web_config = web_config
+        self.jobs_dir = web_config.train_jobs_dir
+        self.lock_path = os.path.join(self.jobs_dir, self.LOCK_FILE)
+        self._process = None
+        self._watcher = None
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _events_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.events.jsonl")
+
+    def _save(self, job: TrainingJob):
+        path = self._job_path(job.job_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def get(self, job_id: str):
+        """The job as last saved, None for an unknown ID."""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._job_path(job_id), encoding="utf-8") as f:
+                job = TrainingJob(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not job.finished and not _process_alive(job.owner_pid):
+            # The worker died without recording the end of the job
+            job.state = "failed"
+            job.error = "Interrupted, the serving worker of the job exited"
+        return job
+
+    def read_events(self, job_id: str, offset: int = 0):
+        """
+        The events appended since the byte offset, with the offset to read
+        from next. A line still being written is left for the next call.
+        """
+        if not job_id.isalnum():
+            return [], offset
+        try:
+            with open(self._events_path(job_id), "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return [], offset
+        end = data.rfind(b"\n") + 1
+        events = [json.loads(line) for line in data[:end].splitlines() if line]
+        return events, offset + end
+
+    def recent_events(self, job_id: str) -> list:
+        """The last RECENT_EVENTS events, read from the end of the file."""
+        if not job_id.isalnum():
+            return []
+        try:
+            with open(self._events_path(job_id), "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                start = max(0, size - self.RECENT_EVENTS_BYTES)
+                f.seek(start)
+                lines = f.read().split(b"\n")
+        except OSError:
+            return []
+        # The first line may be cut by the seek, the last one unfinished
+        lines = lines[1 if start else 0 : -1]
+        return [json.loads(line) for line in lines[-self.RECENT_EVENTS :] if line]
+
+    def status(self, job_id: str):
+        """The job state with its recent events, None for an unknown ID."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        status = job.to_dict()
+        status["events"] = self.recent_events(job_id)
+        return status
+
+    def _active_job(self):
+        """The job of the lock holder; it may not have written its ID yet."""
+        job = None
+        for _ in range(50):
+            with open(self.lock_path, encoding="utf-8") as f:
+                job_id = f.read().strip()
+            job = self.get(job_id) if job_id else None
+            if job is not None and not job.finished:
+                return job
+            time.sleep(0.1)
+        if job is None:
+            raise TrainingJobError("A training job is running but has no status")
+        return job
+
+    def submit(self):
+        """
+        Starts a training job. While one is running, in any worker, it is
+        returned instead with created False, so concurrent requests follow
+        the same run.
+        """
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock_fd)
+            return self._active_job(), False
+
+        try:
+            os.ftruncate(lock_fd, 0)
+            job = TrainingJob(job_id=uuid.uuid4().hex[:12])
+            events = SPAWN.Queue()
+            process = SPAWN.Process(
+                target=_run_training_job,
+                args=(
+                    events,
+                    os.getpid(),
+                    self.web_config.train_cpu_affinity,
+                    self.web_config.train_nice,
+                    self.web_config.train_threads,
+                ),
+                name=f"training-{job.job_id}",
+                daemon=True,
+            )
+            process.start()
+            job.pid = process.pid
+            self._save(job)
+            os.pwrite(lock_fd, job.job_id.encode(), 0)
+        except Exception as e:
+            os.close(lock_fd)
+            raise TrainingJobError(e) from e
+        self._process = process
+        self._forget_old_jobs()
+
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(job, process, events, lock_fd),
+            name=f"training-watcher-{job.job_id}",
+            daemon=True,
+        )
+        self._watcher.start()
+        logger.info(f"Training job {job.job_id} started in process {job.pid}")
+        return job, True
+
+    def _watch(self, job: TrainingJob, process, events, lock_fd: int):
+        try:
+            with open(self._events_path(job.job_id), "a", encoding="utf-8") as log:
+                self._follow(job, process, events, log)
+            process.join()
+            events.close()
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(lock_fd)
+
+    def _follow(self, job: TrainingJob, process, events, log):
+        while not job.finished:
+            try:
+                event = events.get(timeout=0.5)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                # Drain what the process put just before exiting
+                try:
+                    event = events.get(timeout=0.5)
+                except queue.Empty:
+                    self._finish(
+                        job,
+                        "failed",
+                        f"Training process exited with code {process.exitcode}",
+                    )
+                    break
+            # Written before the state, so a finished job has all its events
+            log.write(json.dumps(event) + "\n")
+            log.flush()
+            if event["event"] in ("succeeded", "failed"):
+                self._finish(job, event["event"], event.get("error"))
+            elif event["event"] == "stage_finished":
+                job.stages.append(event)
+                self._save(job)
+
+    def _finish(self, job: TrainingJob, state: str, error: str = None):
+        job.finished_at = time.time()
+        job.error = error
+        job.state = state
+        self._save(job)
+        if error:
+            logger.error(f"Training job {job.job_id} failed: {error}")
+        else:
+            logger.info(f"Training job {job.job_id} finished")
+
+    def _forget_old_jobs(self):
+        paths = [
+            os.path.join(self.jobs_dir, name)
+            for name in os.listdir(self.jobs_dir)
+            if name.endswith(".json")
+        ]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        # The newest file is the job just started
+        for path in paths[self.web_config.train_jobs_kept + 1 :]:
+            events_path = path[: -len(".json")] + ".events.jsonl"
+            for old_path in (path, events_path):
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        """Stops a job started by this worker, the service is going down."""
+        process = self._process
+        if process is not None and process.is_alive():
+            logger.warning(f"Stopping training process {process.pid}")
+            process.terminate()
+            process.join(timeout=10)
+        if self._watcher is not None:
+            # Records the end of the job and releases the lock
+            self._watcher.join(timeout=5)
+
+
+def format_event(event: dict) -> str:
+    """One line of the /train stream."""
+    kind = event["event"]
+    if kind == "stage_started":
+        return f"Stage {event['stage']} started\n"
+    if kind == "stage_finished":
+        source = " (cached)" if event["cached"] else ""
+        return f"Stage {event['stage']} finished in {event['seconds']}s{source}\n"
+    if kind == "epoch_started":
+        return f"Epoch {event['epoch']}/{event['epochs']}\n"
+    metrics = " ".join(
+        f"{name}={value}" for name, value in event.get("metrics", {}).items()
+    )
+    eta = event.get("eta_seconds")
+    eta = f" eta={eta}s" if eta is not None else ""
+    if kind == "batch":
+        steps = f"/{event['steps']}" if event["steps"] else ""
+        return (
+            f"Epoch {event['epoch']}/{event['epochs']} "
+            f"batch {event['batch']}{steps} {metrics}{eta}\n"
+        )
+    if kind == "epoch_finished":
+        return f"Epoch {event['epoch']}/{event['epochs']} done {metrics}{eta}\n"
+    return ""
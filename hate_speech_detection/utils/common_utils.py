@@ -1,5 +1,6 @@
 import yaml
 import os
+import hashlib
 
 
 def read_yaml(path_to_yaml: str) -> dict:
@@ -12,3 +13,18 @@ def create_directories(paths: list):
     """Create directories from a list of paths."""
     for path in paths:
         os.makedirs(path, exist_ok=True)
+
+
+def artifact_path(path: str, file_format: str) -> str:
+    """Return the path with the file extension of the given artifact format."""
+    root, _ = os.path.splitext(path)
+    return f"{root}.{file_format}"
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,67 @@
+import pandas as pd
+
+PARQUET_FORMAT = "parquet"
+
+
+def save_dataframe(
+    df: pd.DataFrame, path: str, compression: str = None, index: bool = True
+):
+    """
+    Saves a DataFrame as CSV or Parquet, depending on the path extension.
+    Parquet files never store the index, which is only a row number here.
+    """
+    if path.endswith(f".{PARQUET_FORMAT}"):
+        df.to_parquet(path, compression=compression, index=False)
+    else:
+        df.to_csv(path, index=index, encoding="utf-8")
+
+
+def load_dataframe(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Loads a DataFrame saved by save_dataframe, reading only the given
+    columns. Parquet files are memory-mapped instead of copied into memory.
+    """
+    if path.endswith(f".{PARQUET_FORMAT}"):
+        return pd.read_parquet(path, columns=columns, memory_map=True)
+    return pd.read_csv(path, usecols=columns, encoding="utf-8")
+
+
+class DataFrameWriter:
+    """Appends DataFrame chunks to a single CSV or Parquet file."""
+
+    def __init__(self, path: str, compression: str = None):
+        self.path = path
+        self.compression = compression
+        self.rows = 0
+        self._parquet_writer = None
+
+    def write(self, chunk: pd.DataFrame):
+        if self.path.endswith(f".{PARQUET_FORMAT}"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(
+                    self.path, table.schema, compression=self.compression or "none"
+                )
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(
+                self.path,
+                mode="w" if self.rows == 0 else "a",
+                header=self.rows == 0,
+                encoding="utf-8",
+            )
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,234 @@
+import os
+import re
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from hate_speech_detection.logger.logger import logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_MODES = ("off", "cprofile", "tracemalloc")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the process so far, None where unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def process_cpu_seconds() -> float:
+    """CPU time of the process and of its finished child processes."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class Instrumentation:
+    """
+    Timers and counters of named stages, saved as a JSON run report.
+
+    Every stage() records its wall time, CPU time and the peak RSS after it;
+    stages entered several times are aggregated. With per_thread_cpu the CPU
+    time is the calling thread's, so concurrent stages do not count each
+    other. The cprofile and tracemalloc modes also capture the listed stages
+    (every stage when none are listed) into profile_dir. Listeners are
+    called with the stage name, wall and CPU seconds after every stage.
+
+    With sharded, for the serving hot path, every thread aggregates into its
+    own stages and counters, merged by report(), so recording takes no lock
+    and the peak RSS is only read for the whole report.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        per_thread_cpu: bool = False,
+        profile: str = "off",
+        profile_stages: list = None,
+        profile_dir: str = None,
+        sharded: bool = False,
+    ):
+        if profile not in PROFILE_MODES:
+            raise ValueError(f"profile must be one of {PROFILE_MODES}")
+        self.name = name
+        self.cpu_clock = time.thread_time if per_thread_cpu else process_cpu_seconds
+        self.profile = profile
+        self.profile_stages = set(profile_stages or [])
+        self.profile_dir = profile_dir
+        self.started_at = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.listeners = []
+        self.sharded = sharded
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+
+    def _shard(self):
+        """Stages and counters of the calling thread."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = ({}, {})
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _profiled(self, stage: str) -> bool:
+        if self.profile == "off":
+            return False
+        return not self.profile_stages or stage in self.profile_stages
+
+    def _profile_path(self, stage: str, extension: str) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        safe_name = re.sub(r"[^\w.-]", "_", f"{self.name}_{stage}")
+        return os.path.join(self.profile_dir, f"{safe_name}.{extension}")
+
+    @contextmanager
+    def _capture(self, stage: str, record: dict):
+        if not self._profiled(stage):
+            yield
+        elif self.profile == "cprofile":
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                record["profile"] = self._profile_path(stage, "prof")
+                profiler.dump_stats(record["profile"])
+        else:
+            import tracemalloc
+
+            tracemalloc.start()
+            try:
+                yield
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                record["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+                record["profile"] = self._profile_path(stage, "tracemalloc.txt")
+                with open(record["profile"], "w", encoding="utf-8") as f:
+                    for stat in snapshot.statistics("lineno")[:50]:
+                        f.write(f"{stat}\n")
+
+    @contextmanager
+    def stage(self, stage: str):
+        """
+        Times the enclosed block. Yields a dict whose keys are added to the
+        stage's entry in the report.
+        """
+        extra = {}
+        wall_start = time.perf_counter()
+        cpu_start = self.cpu_clock()
+        try:
+            with self._capture(stage, extra):
+                yield extra
+        except Exception as e:
+            extra["error"] = str(e)
+            raise
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = self.cpu_clock() - cpu_start
+            self._add(stage, wall, cpu, extra)
+            for listener in self.listeners:
+                listener(stage, wall, cpu)
+
+    @staticmethod
+    def _accumulate(stages: dict, stage: str, wall: float, cpu: float) -> dict:
+        entry = stages.get(stage)
+        if entry is None:
+            entry = stages[stage] = {
+                "calls": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "max_wall_seconds": 0.0,
+            }
+        entry["calls"] += 1
+        entry["wall_seconds"] += wall
+        entry["cpu_seconds"] += cpu
+        entry["max_wall_seconds"] = max(entry["max_wall_seconds"], wall)
+        return entry
+
+    def _add(self, stage: str, wall: float, cpu: float, extra: dict):
+        if self.sharded:
+            entry = self._accumulate(self._shard()[0], stage, wall, cpu)
+            entry.update(extra)
+            return
+        with self._lock:
+            entry = self._accumulate(self.stages, stage, wall, cpu)
+            entry["peak_rss_mb"] = peak_rss_mb()
+            entry.update(extra)
+
+    def count(self, name: str, value: int = 1):
+        if self.sharded:
+            counters = self._shard()[1]
+            counters[name] = counters.get(name, 0) + value
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _merged(self):
+        """Stages and counters of every thread, added up."""
+        stages = {name: dict(entry) for name, entry in self.stages.items()}
+        counters = dict(self.counters)
+        for shard_stages, shard_counters in self._shards:
+            # list() copies in one step, the owner thread may be adding keys
+            for name, entry in list(shard_stages.items()):
+                entry = dict(entry)
+                total = stages.get(name)
+                if total is None:
+                    stages[name] = entry
+                    continue
+                for key in ("calls", "wall_seconds", "cpu_seconds"):
+                    total[key] += entry.pop(key)
+                total["max_wall_seconds"] = max(
+                    total["max_wall_seconds"], entry.pop("max_wall_seconds")
+                )
+                total.update(entry)
+            for name, value in list(shard_counters.items()):
+                counters[name] = counters.get(name, 0) + value
+        return stages, counters
+
+    def report(self) -> dict:
+        with self._lock:
+            stages, counters = self._merged()
+            for entry in stages.values():
+                entry["mean_wall_seconds"] = entry["wall_seconds"] / entry["calls"]
+            return {
+                "name": self.name,
+                "pid": os.getpid(),
+                "started_at": time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)
+                ),
+                "wall_seconds": time.time() - self.started_at,
+                "peak_rss_mb": peak_rss_mb(),
+                "stages": stages,
+                "counters": counters,
+            }
+
+    def save(self, path: str, history_path: str = None) -> dict:
+        """
+        Writes the report to path and, with history_path, appends it as one
+        JSON line, so runs can be compared with each other.
+        """
+        report = self.report()
+        # Per process, concurrent writers must not share the temporary file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+        if history_path:
+            with open(history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report) + "\n")
+        logger.info(f"Run report saved: {path}")
+        return report
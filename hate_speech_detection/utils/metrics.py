@@ -0,0 +1,225 @@
+import bisect
+import threading
+
+# Seconds, from sub-millisecond cache hits to slow cold model calls
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _ShardedMetric:
+    """
+    Base of the metrics updated from the serving threads without locks.
+
+    Every thread writes only its own shard, a dict keyed by label values, so
+    an update is a few dict and list operations under the GIL. A scrape sums
+    the shards; the lock is only taken the first time a thread records.
+    """
+
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _collect_shards(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # list() copies in one step, the owner thread may be adding keys
+            yield from list(shard.items())
+
+    def header(self) -> list:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_ShardedMetric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, labels: tuple = ()):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self) -> dict:
+        totals = {}
+        for labels, value in self._collect_shards():
+            totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> list:
+        lines = self.header()
+        for labels, value in sorted(self.collect().items()):
+            lines.append(
+                f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            )
+        return lines
+
+
+class Histogram(_ShardedMetric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: tuple = ()):
+        shard = self._shard()
+        # One count per bucket plus +Inf, then the sum of the values
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def collect(self) -> dict:
+        totals = {}
+        for labels, counts in self._collect_shards():
+            total = totals.get(labels)
+            if total is None:
+                totals[labels] = list(counts)
+            else:
+                for i, count in enumerate(counts):
+                    total[i] += count
+        return totals
+
+    def render(self) -> list:
+        lines = self.header()
+        bounds = [_number(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for labels, counts in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts[:-1]):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(counts[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read when the metrics are scraped. fn returns a number, or a dict
+    of numbers keyed by label values; None leaves the gauge out. A kind of
+    counter exposes a total that is kept elsewhere.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        fn,
+        labelnames: tuple = (),
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self) -> list:
+        values = self.fn()
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for labels, value in sorted(values.items()):
+            if value is not None:
+                lines.append(
+                    f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                )
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics of one process, rendered in the Prometheus text format."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.metrics = []
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(self.prefix + name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(
+            Histogram(self.prefix + name, documentation, labelnames, buckets)
+        )
+
+    def gauge(
+        self, name: str, documentation: str, fn, labelnames=(), kind="gauge"
+    ) -> Gauge:
+        return self._register(
+            Gauge(self.prefix + name, documentation, fn, labelnames, kind)
+        )
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,149 @@
+"""
+Pre-fork server for app_fast.
+
+The parent process builds the prediction pipeline, loads the artifacts and
+binds the socket once, then forks the workers, which share the loaded
+weights copy-on-write. With prediction.engine numpy or quantized the weights
+are memory-mapped .npy files, so every worker also shares the same page
+cache pages. The parent supervises the workers and restarts any that exit.
+
+    python serve.py --workers 4 --port 80
+"""
+
+import gc
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import uvicorn
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """Forks serving workers on a shared socket and keeps them running."""
+
+    def __init__(self, app, sock, workers: int, restart_delay: float, logger):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self.logger = logger
+        self.children = {}
+        self.stopping = False
+
+    def _run_worker(self):
+        # Uvicorn installs its own handlers for a graceful shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        server = uvicorn.Server(uvicorn.Config(self.app, lifespan="on"))
+        server.run(sockets=[self.sock])
+
+    def spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                self.logger.exception(f"Worker {slot} crashed")
+                exit_code = 1
+            finally:
+                # os._exit skips atexit, write the queued log records first;
+                # the worker must never return into the supervisor code
+                try:
+                    from hate_speech_detection.logger.logger import flush_logs
+
+                    flush_logs()
+                finally:
+                    os._exit(exit_code)
+        self.children[pid] = (slot, time.monotonic())
+        self.logger.info(f"Started worker {slot} (pid {pid})")
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        self.logger.info(f"Received signal {signum}, stopping workers...")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot, started = self.children.pop(pid, (None, None))
+            if slot is None or self.stopping:
+                continue
+            exit_code = os.waitstatus_to_exitcode(status)
+            self.logger.warning(f"Worker {slot} (pid {pid}) exited with {exit_code}")
+            # Do not spin when a worker dies right after starting
+            if time.monotonic() - started < self.restart_delay:
+                time.sleep(self.restart_delay)
+            if not self.stopping:
+                self.spawn(slot)
+        self.logger.info("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork server for app_fast")
+    parser.add_argument("--host", help="defaults to web.app_host")
+    parser.add_argument("--port", type=int, help="defaults to web.app_port")
+    parser.add_argument("--workers", type=int, help="defaults to web.workers")
+    args = parser.parse_args()
+
+    import app_fast
+    from hate_speech_detection.logger.logger import logger
+
+    web_config = app_fast.web_config
+    workers = args.workers if args.workers is not None else web_config.workers
+    workers = workers or os.cpu_count()
+
+    app_fast.predict_pipeline.cleaner.load()
+    registry = app_fast.predict_pipeline.registry
+    if registry.engine == "keras":
+        # TensorFlow's runtime does not survive a fork, each worker loads its own
+        logger.warning(
+            "Serving with Keras: every worker loads its own model copy, "
+            "use numpy or quantized to share the weights"
+        )
+    else:
+        try:
+            registry.load()
+        except Exception as e:
+            logger.warning(f"Prediction artifacts not preloaded: {e}")
+    # Keep the loaded objects out of the collector, so it does not touch
+    # (and copy) their pages in every worker
+    gc.freeze()
+
+    host = args.host or web_config.app_host
+    sock = bind_socket(host, args.port or web_config.app_port)
+    logger.info(f"Serving on {sock.getsockname()} with {workers} workers")
+    Supervisor(
+        app_fast.app, sock, workers, web_config.worker_restart_delay, logger
+    ).run()
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())